@@ -0,0 +1,62 @@
+import argparse
+import os
+import random
+import sys
+
+# 随机编辑的模糊测试：每次编辑后比较IncrementalTokenizer与完整tokenize的结果，
+# 记号列表、出错位置和错误信息都必须完全一致
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'calculation'))
+
+from expression import ExpressionError, IncrementalTokenizer, tokenize
+
+ALPHABET = '0123456789..+-*/()  abx_$\t'
+MAX_LENGTH = 120
+
+def random_edit(rng, source):
+    # 在随机位置插入、删除或替换一小段文字；多数编辑发生在末尾，与输入时的情况一致
+    position = len(source) if rng.random() < 0.5 else rng.randint(0, len(source))
+    kind = rng.random()
+    if kind < 0.5 or not source:
+        text = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 4)))
+        return source[:position] + text + source[position:]
+    end = min(len(source), position + rng.randint(1, 4))
+    if kind < 0.8:
+        start = max(0, min(position, end - 1))
+        return source[:start] + source[end:]
+    text = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 4)))
+    return source[:position] + text + source[end:]
+
+def check(edits, seed=0):
+    # 返回不一致的编辑次数
+    rng = random.Random(seed)
+    tokenizer = IncrementalTokenizer()
+    source = ''
+    mismatches = 0
+    for _ in range(edits):
+        source = random_edit(rng, source) if len(source) < MAX_LENGTH else ''
+        _, tokens, error = tokenizer.update(source).snapshot()
+        try:
+            expected = tokenize(source)
+        except ExpressionError as e:
+            same = error is not None and (error.position, str(error)) == (e.position, str(e))
+        else:
+            same = error is None and tokens == expected
+        if not same:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f'不一致: {source!r}', file=sys.stderr)
+    return mismatches
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='对照完整tokenize检查IncrementalTokenizer')
+    parser.add_argument('-n', '--edits', type=int, default=120000, help='随机编辑次数')
+    parser.add_argument('-s', '--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    mismatches = check(args.edits, args.seed)
+    print(f'{args.edits}次编辑: {mismatches}处不一致')
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
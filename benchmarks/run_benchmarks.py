@@ -0,0 +1,361 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import timeit
+
+# 性能基准：贪吃蛇的寻路、移动、果实刷新、绘制，以及计算器的校验和求值。
+# 可在没有显示器的Linux上运行（SDL使用dummy驱动），结果输出为JSON，
+# 并与保存的基准结果比较，慢于阈值的项目视为性能回退。
+# 共享的虚拟机上测量抖动很大：慢于阈值的项目会重新测量，
+# 保存基准时记录的各轮抖动幅度也会相应放宽该项目的阈值。
+# 基准结果与机器有关，仓库中的baseline.json只作参考：默认只打印比较结果，
+# 要把回退当作失败（退出码1），先在本机用 --save-baseline 重新生成，再加 --strict 运行
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'snake_game'))
+sys.path.insert(0, os.path.join(ROOT, 'calculation'))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+DEFAULT_THRESHOLD = 1.25  # 比基准慢25%以上视为回退
+MIN_ROUND_SECONDS = 0.2  # 每轮计时至少这么长，太短的轮次受调度抖动影响大
+DEFAULT_CONFIRM = 2  # 判定回退前对慢的项目重新测量的次数
+
+BENCHMARKS = []
+
+def benchmark(name, number):
+    # 注册基准：被装饰的函数负责准备数据，返回每次计时调用的函数和每次调用包含的操作数
+    def register(setup):
+        BENCHMARKS.append((name, number, setup))
+        return setup
+    return register
+
+# ---- 贪吃蛇 ----
+
+def serpentine(width, length):
+    # 从左上角开始按行来回排列的length个格子，最后一个格子挨着下面的空行
+    cells = []
+    for i in range(length):
+        y, x = divmod(i, width)
+        cells.append((x if y % 2 == 0 else width - 1 - x, y))
+    return cells
+
+def crowded_snake(length):
+    from board import Board
+    from snake_core import GRID_HEIGHT, GRID_WIDTH, Snake
+
+    board = Board(GRID_WIDTH, GRID_HEIGHT)
+    cells = serpentine(GRID_WIDTH, length)
+    snake = Snake(cells[0][0], cells[0][1], (0, 0, 0), board=board)
+    for cell in cells[1:]:
+        snake.push_head(cell)
+    return snake
+
+def find_path_setup(length, astar):
+    def setup():
+        from snake_core import GRID_HEIGHT, GRID_WIDTH, find_path
+
+        snake = crowded_snake(length)
+        head = snake.get_head()
+        target = (GRID_WIDTH - 1 - head[0], GRID_HEIGHT - 1)
+        occupancy = snake.board.occupancy
+        return lambda: find_path(head, target, occupancy, astar), 1
+    return setup
+
+for _length in (10, 200, 600):
+    benchmark(f'snake.find_path.bfs.len{_length}', 200)(find_path_setup(_length, False))
+    benchmark(f'snake.find_path.astar.len{_length}', 200)(find_path_setup(_length, True))
+
+def ring(side):
+    # 边长为side的正方形环上的格子，按顺时针排列
+    cells = [(x, 0) for x in range(side)]
+    cells += [(side - 1, y) for y in range(1, side)]
+    cells += [(x, side - 1) for x in range(side - 2, -1, -1)]
+    cells += [(0, y) for y in range(side - 2, 0, -1)]
+    return cells
+
+@benchmark('snake.move.len1000', 20000)
+def snake_move_setup():
+    from board import Board
+    from snake_core import Snake
+
+    # 长度1000的蛇沿周长1196的环一直前进
+    cells = ring(300)
+    length = 1000
+    snake = Snake(cells[0][0], cells[0][1], (0, 0, 0), board=Board(300, 300))
+    for cell in cells[1:length]:
+        snake.push_head(cell)
+    directions = []
+    for i in range(len(cells)):
+        (x0, y0), (x1, y1) = cells[i], cells[(i + 1) % len(cells)]
+        directions.append((x1 - x0, y1 - y0))
+    state = {'step': length - 1}
+
+    def move():
+        step = state['step']
+        snake.direction = directions[step % len(directions)]
+        snake.move()
+        state['step'] = step + 1
+    return move, 1
+
+@benchmark('snake.fruit_respawn.crowded95', 20000)
+def fruit_respawn_setup():
+    from board import Board
+    from snake_core import GRID_HEIGHT, GRID_WIDTH, Fruit
+
+    rng = random.Random(0)
+    board = Board(GRID_WIDTH, GRID_HEIGHT)
+    for index in rng.sample(range(board.size), board.size * 95 // 100):
+        board.occupy(index)
+    fruit = Fruit(board=board, rng=rng)
+    return lambda: fruit.respawn(board), 1
+
+@benchmark('snake.draw_rounded_rect', 2000)
+def rounded_rect_setup():
+    import pygame
+    from renderer import draw_rounded_rect
+    from snake_core import GRID_SIZE
+
+    surface = pygame.Surface((GRID_SIZE, GRID_SIZE), pygame.SRCALPHA)
+    return lambda: draw_rounded_rect(surface, (100, 149, 237), (1, 1, GRID_SIZE - 2, GRID_SIZE - 2), 0.5), 1
+
+def renderer_and_game():
+    import pygame
+    from renderer import Renderer
+    from snake_core import WINDOW_SIZE, Game
+
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode(WINDOW_SIZE)
+    font = pygame.font.Font(None, 36)
+    small_font = pygame.font.Font(None, 24)
+    game = Game("困难", player_difficulty="困难", seed=0)
+    # 先跑一段，让蛇有一定长度
+    for _ in range(300):
+        game.step()
+    return Renderer(screen, font, small_font), game
+
+@benchmark('snake.frame.full_redraw', 200)
+def full_frame_setup():
+    renderer, game = renderer_and_game()
+
+    def frame():
+        renderer.invalidate()
+        renderer.draw_game(game, "困难")
+    return frame, 1
+
+@benchmark('snake.frame.step_and_draw', 500)
+def incremental_frame_setup():
+    from snake_core import Game
+
+    renderer, game = renderer_and_game()
+    state = {'game': game, 'seed': 0}
+
+    def frame():
+        game = state['game']
+        if not game.step():
+            state['seed'] += 1
+            game = state['game'] = Game("困难", player_difficulty="困难", seed=state['seed'])
+        renderer.draw_game(game, "困难")
+    return frame, 1
+
+# ---- 计算器 ----
+
+def random_expression(rng, depth=3):
+    if depth == 0 or rng.random() < 0.3:
+        if rng.random() < 0.3:
+            return f'{rng.randint(0, 999)}.{rng.randint(0, 99)}'
+        return str(rng.randint(1, 9999))
+    left = random_expression(rng, depth - 1)
+    right = random_expression(rng, depth - 1)
+    expression = f'{left}{rng.choice("+-*/")}{right}'
+    if rng.random() < 0.3:
+        expression = f'({expression})'
+    if rng.random() < 0.1:
+        expression = '-' + expression
+    return expression
+
+def expressions(count, seed=0):
+    rng = random.Random(seed)
+    return [random_expression(rng, 4) for _ in range(count)]
+
+@benchmark('calc.is_valid_expression.cold', 5)
+def validate_cold_setup():
+    import calc_api
+
+    sources = expressions(2000)
+
+    def run():
+        calc_api.clear_cache()
+        for source in sources:
+            calc_api.is_valid_expression(source)
+    return run, len(sources)
+
+@benchmark('calc.is_valid_expression.cached', 20)
+def validate_cached_setup():
+    import calc_api
+
+    sources = expressions(2000)
+
+    def run():
+        for source in sources:
+            calc_api.is_valid_expression(source)
+    return run, len(sources)
+
+@benchmark('calc.calculate.cold', 5)
+def calculate_cold_setup():
+    import calc_api
+    from expression import ExpressionError
+
+    sources = expressions(2000, seed=1)
+
+    def run():
+        calc_api.clear_cache()
+        for source in sources:
+            try:
+                calc_api.calculate(source)
+            except ExpressionError:
+                pass
+    return run, len(sources)
+
+@benchmark('calc.calculate.cached', 20)
+def calculate_cached_setup():
+    import calc_api
+    from expression import ExpressionError
+
+    sources = expressions(2000, seed=1)
+
+    def run():
+        for source in sources:
+            try:
+                calc_api.calculate(source)
+            except ExpressionError:
+                pass
+    return run, len(sources)
+
+# ---- 运行与比较 ----
+
+def measure(setup, number, repeat):
+    # 每轮至少运行MIN_ROUND_SECONDS（不足时按比例增加调用次数），重复repeat轮；
+    # 返回最快一轮的每次操作耗时(微秒)、总操作数，以及最慢一轮与最快一轮之比（本机的抖动幅度）
+    func, ops = setup()
+    func()  # 预热
+    timer = timeit.Timer(func)
+    elapsed = timer.timeit(number)
+    if elapsed < MIN_ROUND_SECONDS:
+        number = int(number * MIN_ROUND_SECONDS / max(elapsed, 1e-9)) + 1
+    rounds = timer.repeat(repeat, number)
+    return {'us_per_op': min(rounds) / (number * ops) * 1e6, 'ops': number * ops,
+            'spread': max(rounds) / min(rounds)}
+
+def run_benchmarks(pattern=None, repeat=5):
+    results = {}
+    for name, number, setup in BENCHMARKS:
+        if pattern and pattern not in name:
+            continue
+        results[name] = measure(setup, number, repeat)
+        print(f'{name:<40}{results[name]["us_per_op"]:12.3f} us/op', file=sys.stderr)
+    return results
+
+def confirm(results, names, repeat):
+    # 重新测量指定的项目，保留更快的一次和更大的抖动幅度，排除偶然的抖动
+    registry = {name: (number, setup) for name, number, setup in BENCHMARKS}
+    for name in names:
+        number, setup = registry[name]
+        result = measure(setup, number, repeat)
+        print(f'{name:<40}{result["us_per_op"]:12.3f} us/op (复测)', file=sys.stderr)
+        result['spread'] = max(result['spread'], results[name]['spread'])
+        if result['us_per_op'] > results[name]['us_per_op']:
+            result['us_per_op'] = results[name]['us_per_op']
+            result['ops'] = results[name]['ops']
+        results[name] = result
+
+def environment():
+    info = {'python': platform.python_version(), 'machine': platform.machine(), 'system': platform.system()}
+    try:
+        import pygame
+        info['pygame'] = pygame.version.ver
+    except ImportError:
+        pass
+    return info
+
+def compare(results, baseline, threshold):
+    # 返回 (名称, 基准耗时, 当前耗时, 比值, 允许的比值) 列表和回退项目的名称；
+    # 保存基准时各轮之间抖动较大的项目按抖动幅度放宽阈值
+    rows = []
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        ratio = result['us_per_op'] / base['us_per_op']
+        limit = threshold * max(1.0, base.get('spread', 1.0))
+        rows.append((name, base['us_per_op'], result['us_per_op'], ratio, limit))
+        if ratio > limit:
+            regressions.append(name)
+    return rows, regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='贪吃蛇和计算器的性能基准')
+    parser.add_argument('-k', '--filter', help='只运行名称包含该字符串的基准')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='每个基准重复的轮数')
+    parser.add_argument('-o', '--output', help='把结果保存为JSON文件，默认输出到标准输出')
+    parser.add_argument('--baseline', default=BASELINE, help='用于比较的基准结果文件')
+    parser.add_argument('--save-baseline', action='store_true', help='把本次结果保存为新的基准')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='当前耗时/基准耗时超过该值时视为回退')
+    parser.add_argument('--confirm', type=int, default=DEFAULT_CONFIRM,
+                        help='判定回退前对慢于阈值的项目重新测量的次数（保存基准时每项都重新测量）')
+    parser.add_argument('--strict', action='store_true',
+                        help='有回退时退出码为1；基准须是在本机用--save-baseline生成的')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.filter, args.repeat)
+    baseline = None
+    if args.save_baseline:
+        # 基准结果同样多测几次，取最快的一次，抖动幅度取各次中最大的
+        for _ in range(args.confirm):
+            confirm(results, list(results), args.repeat)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        for _ in range(args.confirm):
+            _, regressions = compare(results, baseline, args.threshold)
+            if not regressions:
+                break
+            confirm(results, regressions, args.repeat)
+    report = {'environment': environment(), 'results': results}
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        print(f'已保存基准: {args.baseline}', file=sys.stderr)
+        return 0
+
+    if baseline is None:
+        print('没有基准结果，跳过比较', file=sys.stderr)
+        return 0
+    rows, regressions = compare(results, baseline, args.threshold)
+    for name, base, current, ratio, limit in rows:
+        mark = '  <-- 回退' if name in regressions else ''
+        print(f'{name:<40}{base:12.3f}{current:12.3f}{ratio:8.2f}x /{limit:5.2f}x{mark}', file=sys.stderr)
+    if regressions:
+        print(f'{len(regressions)}项慢于基准且超出允许的比值', file=sys.stderr)
+        if args.strict:
+            return 1
+        print('基准结果不是在本机生成时比较仅供参考，需要据此判定失败请加 --strict', file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
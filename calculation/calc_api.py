@@ -0,0 +1,105 @@
+import re
+import threading
+from collections import OrderedDict
+
+from expression import ExpressionError, compile_expression
+from numeric import format_number
+
+# 计算器的无界面接口：解析、校验、求值都不依赖tkinter，
+# 编译结果按规范化后的表达式文本放入有上限的LRU缓存，同一表达式只解析一次
+
+DEFAULT_CACHE_SIZE = 4096
+
+_SPACES = re.compile(r'\s+')
+_OPERATOR_SPACES = re.compile(r' ?([-+*/()]) ?')
+
+def normalize(source):
+    # 去掉运算符和括号两侧的空白，"1 + 2" 与 "1+2" 共用同一个缓存项；
+    # 数字、变量名之间的空白保留为一个空格，避免 "1 2" 与 "12" 混为一谈
+    if not _SPACES.search(source):
+        return source
+    return _OPERATOR_SPACES.sub(lambda match: match.group(1), _SPACES.sub(' ', source.strip()))
+
+class ExpressionCache:
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._programs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, source):
+        key = normalize(source)
+        with self._lock:
+            program = self._programs.get(key)
+            if program is None:
+                self.misses += 1
+            else:
+                self._programs.move_to_end(key)
+                self.hits += 1
+        if program is not None:
+            # 缓存的程序可能来自空白不同的写法，位置换算到当前文本，运行时的出错位置才与输入一致
+            return program.rebase(source)
+
+        # 用原始文本编译，出错时位置信息与用户输入一致；编译失败的表达式不缓存
+        program = compile_expression(source)
+        with self._lock:
+            self._programs[key] = program
+            self._programs.move_to_end(key)
+            while len(self._programs) > self.maxsize:
+                self._programs.popitem(last=False)
+        return program
+
+    def resize(self, maxsize):
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._programs) > maxsize:
+                self._programs.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._programs.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'size': len(self._programs), 'maxsize': self.maxsize}
+
+_cache = ExpressionCache()
+
+def compile_cached(source):
+    return _cache.get(source)
+
+def validate(source):
+    # 返回None表示表达式合法，否则返回ExpressionError
+    try:
+        compile_cached(source)
+    except ExpressionError as e:
+        return e
+    return None
+
+def is_valid_expression(source):
+    return validate(source) is None
+
+def evaluate(source, variables=None, backend=None):
+    # backend见numeric.get_backend，默认与原来一样使用float
+    return compile_cached(source).evaluate(variables, backend)
+
+def format_result(result):
+    # 处理整数和小数的显示：整数结果不显示.0
+    return format_number(result)
+
+def calculate(source, backend=None):
+    # 与计算器按下"="相同：求值并按显示规则格式化
+    return format_result(evaluate(source, backend=backend))
+
+def cache_info():
+    return _cache.info()
+
+def clear_cache():
+    _cache.clear()
+
+def set_cache_size(maxsize):
+    _cache.resize(maxsize)
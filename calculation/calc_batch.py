@@ -0,0 +1,61 @@
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool
+
+from calc_api import compile_cached, format_result
+
+# 批量/流式求值：逐行读入表达式，按输入顺序输出结果或错误，
+# 全程使用生成器，内存占用与输入总行数无关
+
+DEFAULT_CHUNK_SIZE = 1000
+
+def evaluate_line(line, backend=None):
+    # 返回一行输出；空行原样输出为空行
+    expression = line.strip()
+    if not expression:
+        return ''
+    try:
+        return format_result(compile_cached(expression).evaluate(backend=backend))
+    except Exception as e:
+        return f'错误: {e}'
+
+def evaluate_chunk(lines, backend=None):
+    return [evaluate_line(line, backend) for line in lines]
+
+def iter_chunks(lines, chunk_size):
+    lines = iter(lines)
+    while True:
+        chunk = list(islice(lines, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def iter_results(lines, backend=None):
+    for line in lines:
+        yield evaluate_line(line, backend)
+
+def iter_results_parallel(lines, workers, chunk_size=DEFAULT_CHUNK_SIZE, backend=None):
+    # 分块交给进程池，同时在途的块数有上限，按提交顺序取回结果
+    max_pending = workers * 2
+    with Pool(workers) as pool:
+        pending = deque()
+        for chunk in iter_chunks(lines, chunk_size):
+            pending.append(pool.apply_async(evaluate_chunk, (chunk, backend)))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().get()
+        while pending:
+            yield from pending.popleft().get()
+
+def run_batch(input_stream, output_stream, workers=1, chunk_size=DEFAULT_CHUNK_SIZE, backend=None):
+    lines = (line.rstrip('\r\n') for line in input_stream)
+    if workers > 1:
+        results = iter_results_parallel(lines, workers, chunk_size, backend)
+    else:
+        results = iter_results(lines, backend)
+    count = 0
+    for result in results:
+        output_stream.write(result)
+        output_stream.write('\n')
+        count += 1
+    output_stream.flush()
+    return count
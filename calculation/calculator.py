@@ -1,33 +1,163 @@
-import tkinter as tk
-from tkinter import messagebox
-import re
+import argparse
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import tkinter as tk
+    from tkinter import messagebox
+except ImportError:  # 没有图形界面的主机上只能批量求值
+    tk = None
+
+from calc_api import compile_cached, format_result, is_valid_expression
+from expression import ExpressionError, IncrementalTokenizer, compile_tokens
+from history import History, backend_tag
+from numeric import BACKENDS, get_backend
+
+PREVIEW_DELAY_MS = 120  # 输入停顿多久后计算预览
+PREVIEW_POLL_MS = 20  # 检查后台计算是否完成的间隔
+HISTORY_PAGE = 100  # 历史面板每次加载的记录数
+HISTORY_RETRY_MS = 100  # 索引还在建立时，隔多久再尝试搜索
+
+def preview_result(source, tokens, error, backend):
+    # 在后台线程中用已经扫描好的记号编译并求值，返回格式化后的结果
+    if error is not None:
+        raise error
+    return format_result(compile_tokens(source, tokens).evaluate(backend=backend))
+
+class HistoryPanel:
+    # 历史记录窗口：从最新的记录开始按页加载，滚动到接近底部时再读下一页；
+    # 输入搜索内容时显示以它开头的表达式，双击把表达式放回计算器
+    def __init__(self, calculator):
+        self.calculator = calculator
+        self.history = calculator.history
+        self.window = tk.Toplevel(calculator.master)
+        self.window.title("历史记录")
+        self.window.geometry("360x420")
+
+        self.query = tk.StringVar(self.window)
+        search = tk.Entry(self.window, font=('Arial', 12), textvariable=self.query)
+        search.pack(fill=tk.X, padx=5, pady=5)
+        frame = tk.Frame(self.window)
+        frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=(0, 5))
+        self.scrollbar = tk.Scrollbar(frame)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox = tk.Listbox(frame, font=('Arial', 11), yscrollcommand=self.on_scroll)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.config(command=self.listbox.yview)
+        self.listbox.bind('<Double-Button-1>', self.recall)
+        self.listbox.bind('<Return>', self.recall)
+        self.window.bind('<Escape>', lambda event: self.window.destroy())
+        self.query.trace_add('write', self.on_query)
+        search.focus_set()
+
+        self.expressions = []  # 与列表中的每一行对应
+        self.before = None  # 下一页从这个位置向前读取
+        self.exhausted = False
+        self.retry = None  # 等待索引建好后重新搜索的after任务
+        self.show_recent()
+
+    def show_recent(self):
+        self.listbox.delete(0, tk.END)
+        self.expressions = []
+        self.before = None
+        self.exhausted = False
+        self.load_more()
+
+    def load_more(self):
+        if self.exhausted:
+            return
+        entries, self.before = self.history.page(self.before, HISTORY_PAGE)
+        self.exhausted = self.before is None
+        self.add_entries(entries)
+
+    def add_entries(self, entries):
+        for expression, result, _ in entries:
+            self.expressions.append(expression)
+            self.listbox.insert(tk.END, f'{expression} = {result}')
+
+    def on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        # 搜索结果一次显示完，只有浏览全部记录时才需要继续加载
+        if not self.query.get().strip() and float(last) > 0.9:
+            self.load_more()
+
+    def on_query(self, *args):
+        if self.retry is not None:
+            self.window.after_cancel(self.retry)
+            self.retry = None
+        if not self.window.winfo_exists():
+            return
+        prefix = self.query.get()
+        if not prefix.strip():
+            self.show_recent()
+            return
+        self.listbox.delete(0, tk.END)
+        self.expressions = []
+        self.exhausted = True
+        matches = self.history.search(prefix)
+        if matches is None:
+            # 后台还在建立索引：先显示提示，稍后再搜索，不阻塞界面
+            self.listbox.insert(tk.END, '正在建立历史索引…')
+            self.retry = self.window.after(HISTORY_RETRY_MS, self.on_query)
+            return
+        self.add_entries(matches)
+
+    def recall(self, event):
+        selection = self.listbox.curselection()
+        if selection:
+            display = self.calculator.display
+            display.delete(0, tk.END)
+            display.insert(0, self.expressions[selection[0]])
 
 class Calculator:
-    def __init__(self, master):
+    def __init__(self, master, backend=None, history=None):
         self.master = master
+        self.backend = backend  # 数值后端，None表示使用float
+        self.history = history  # 计算历史，None表示不保存
         master.title("计算器")
         master.configure(bg='#f0f0f0')
         
         # 设置窗口大小和位置
-        master.geometry("300x400")
+        master.geometry("300x480" if history is not None else "300x430")
         master.resizable(False, False)
         
-        # 显示框
-        self.display = tk.Entry(master, font=('Arial', 18), bd=10, insertwidth=1, width=17, justify='right')
-        self.display.grid(row=0, column=0, columnspan=4, padx=10, pady=10)
+        # 显示框：按钮和键盘输入都直接修改其中的文字，文字变化时更新预览
+        self.text = tk.StringVar(master)
+        self.display = tk.Entry(master, font=('Arial', 18), bd=10, insertwidth=1, width=17, justify='right',
+                                textvariable=self.text)
+        self.display.grid(row=0, column=0, columnspan=4, padx=10, pady=(10, 0))
+        self.display.bind('<Return>', self.calculate)
+        self.display.bind('<KP_Enter>', self.calculate)
+        self.display.bind('<Escape>', self.clear)
+        self.display.focus_set()
+
+        # 实时预览当前表达式的结果
+        self.preview = tk.Label(master, font=('Arial', 12), fg='gray', bg='#f0f0f0', anchor='e', width=26)
+        self.preview.grid(row=1, column=0, columnspan=4, padx=10, pady=(0, 5))
+        self.tokenizer = IncrementalTokenizer()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.pending = None  # 等待计算预览的after任务
+        self.future = None  # 正在后台计算的预览
+        self.text.trace_add('write', self.on_change)
         
         # 按钮布局
         button_layout = [
-            ('C', 1, 0), ('⌫', 1, 1), ('(', 1, 2), (')', 1, 3),
-            ('7', 2, 0), ('8', 2, 1), ('9', 2, 2), ('/', 2, 3),
-            ('4', 3, 0), ('5', 3, 1), ('6', 3, 2), ('*', 3, 3),
-            ('1', 4, 0), ('2', 4, 1), ('3', 4, 2), ('-', 4, 3),
-            ('0', 5, 0), ('.', 5, 1), ('=', 5, 2), ('+', 5, 3)
+            ('C', 2, 0), ('⌫', 2, 1), ('(', 2, 2), (')', 2, 3),
+            ('7', 3, 0), ('8', 3, 1), ('9', 3, 2), ('/', 3, 3),
+            ('4', 4, 0), ('5', 4, 1), ('6', 4, 2), ('*', 4, 3),
+            ('1', 5, 0), ('2', 5, 1), ('3', 5, 2), ('-', 5, 3),
+            ('0', 6, 0), ('.', 6, 1), ('=', 6, 2), ('+', 6, 3)
         ]
         
         # 创建按钮
         for (text, row, col) in button_layout:
             self.create_button(text, row, col)
+
+        if history is not None:
+            history_button = tk.Button(master, text='历史', font=('Arial', 12), bg='#E0E0E0',
+                                       command=self.show_history)
+            history_button.grid(row=7, column=0, columnspan=4, padx=5, pady=(0, 5), sticky='ew')
+            master.bind('<Control-h>', self.show_history)
     
     def create_button(self, text, row, col):
         # 设置不同类型按钮的样式
@@ -60,57 +190,127 @@ class Calculator:
             button.bind('<Button-1>', lambda event, digit=text: self.add_to_display(digit))
     
     def add_to_display(self, value):
-        current = self.display.get()
-        self.display.delete(0, tk.END)
-        self.display.insert(0, current + value)
+        # 只在末尾追加，不重写整个输入框
+        self.display.insert(tk.END, value)
     
     def clear(self, event):
         self.display.delete(0, tk.END)
     
     def backspace(self, event):
-        current = self.display.get()
-        self.display.delete(0, tk.END)
-        self.display.insert(0, current[:-1])
+        length = self.display.index(tk.END)
+        if length:
+            self.display.delete(length - 1)
+
+    def on_change(self, *args):
+        # 输入变化时只重新扫描修改位置之后的部分，停顿一会儿再在后台计算预览
+        self.tokenizer.update(self.text.get())
+        if self.pending is not None:
+            self.master.after_cancel(self.pending)
+        self.pending = self.master.after(PREVIEW_DELAY_MS, self.start_preview)
+
+    def start_preview(self):
+        self.pending = None
+        if self.future is not None:
+            # 还没开始的旧计算直接取消，已经在算的结果到达后丢弃
+            self.future.cancel()
+        source, tokens, error = self.tokenizer.snapshot()
+        if not source.strip():
+            self.future = None
+            self.preview.config(text='')
+            return
+        self.future = self.executor.submit(preview_result, source, tokens, error, self.backend)
+        self.master.after(PREVIEW_POLL_MS, self.poll_preview, self.future, source)
+
+    def poll_preview(self, future, source):
+        if future is not self.future:
+            return
+        if not future.done():
+            self.master.after(PREVIEW_POLL_MS, self.poll_preview, future, source)
+            return
+        self.future = None
+        try:
+            text = f'= {future.result()}'
+        except ExpressionError as e:
+            # 表达式还没输入完（错误在末尾）时不提示
+            text = '' if e.position is None or e.position >= len(source.rstrip()) else str(e)
+        except Exception:
+            text = ''
+        self.preview.config(text=text)
     
     def calculate(self, event):
         try:
             expression = self.display.get()
-            
-            # 检查表达式是否合法
-            if not self.is_valid_expression(expression):
-                messagebox.showerror("错误", "表达式格式不正确")
-                return
-            
-            # 计算结果
-            result = eval(expression)
-            
-            # 显示结果，处理整数和小数的显示
-            if result == int(result):
-                result = int(result)
-            
+
+            # 以前在同一数值后端下算过的表达式直接取历史中的结果
+            tag = backend_tag(self.backend)
+            result = None if self.history is None else self.history.lookup(expression, tag)
+            if result is None:
+                # 编译表达式（相同表达式直接取缓存），格式不正确时给出出错位置
+                try:
+                    program = compile_cached(expression)
+                except ExpressionError as e:
+                    messagebox.showerror("错误", f"表达式格式不正确\n{e}")
+                    return
+
+                # 计算结果，整数结果不显示.0
+                result = format_result(program.evaluate(backend=self.backend))
+            if self.history is not None:
+                self.history.append(expression, result, tag)
+
             self.display.delete(0, tk.END)
-            self.display.insert(0, str(result))
+            self.display.insert(0, result)
         except Exception as e:
             messagebox.showerror("错误", f"计算错误: {str(e)}")
             self.display.delete(0, tk.END)
-    
+
+    def show_history(self, event=None):
+        HistoryPanel(self)
+
     def is_valid_expression(self, expression):
-        # 检查括号是否匹配
-        if expression.count('(') != expression.count(')'):
-            return False
-        
-        # 检查表达式格式是否正确
-        pattern = r'^[0-9+\-*/().]+$'
-        if not re.match(pattern, expression):
-            return False
-        
-        # 检查是否有连续的运算符
-        if re.search(r'[+\-*/]{2,}', expression):
-            return False
-        
-        return True
+        # 能否被表达式引擎编译（括号匹配、字符合法、运算符位置正确）
+        return is_valid_expression(expression)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='计算器：不带参数时打开窗口，指定输入文件时批量求值')
+    parser.add_argument('input', nargs='?', help='表达式文件，每行一个表达式；"-"表示从标准输入读取')
+    parser.add_argument('-o', '--output', help='结果输出文件，默认输出到标准输出')
+    parser.add_argument('-j', '--workers', type=int, default=1, help='并行求值的进程数')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='每个进程任务包含的行数')
+    parser.add_argument('--numeric', choices=BACKENDS, default='float',
+                        help='数值后端：float(默认)、decimal(十进制)或fraction(精确分数)')
+    parser.add_argument('--precision', type=int, default=28, help='decimal后端的有效数字位数')
+    parser.add_argument('--history', metavar='PATH', help='计算历史文件，默认保存在用户数据目录')
+    parser.add_argument('--no-history', action='store_true', help='不读取也不保存计算历史')
+    args = parser.parse_args(argv)
+    backend = get_backend(args.numeric, args.precision)
+
+    if args.input is None:
+        if tk is None:
+            parser.error('没有可用的tkinter，无法打开窗口；请指定输入文件批量求值')
+        history = None
+        if not args.no_history:
+            try:
+                history = History(args.history)
+            except (OSError, ValueError) as e:
+                print(f'无法打开计算历史: {e}', file=sys.stderr)
+        root = tk.Tk()
+        app = Calculator(root, backend, history)
+        root.mainloop()
+        if history is not None:
+            history.close()
+        return
+
+    from calc_batch import run_batch
+
+    input_stream = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    output_stream = sys.stdout if args.output is None else open(args.output, 'w', encoding='utf-8')
+    try:
+        run_batch(input_stream, output_stream, args.workers, args.chunk_size, backend)
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output_stream is not sys.stdout:
+            output_stream.close()
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = Calculator(root)
-    root.mainloop()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,278 @@
+import operator
+import re
+from bisect import bisect_left
+from collections import namedtuple
+from decimal import InvalidOperation
+
+# 表达式引擎：词法分析 + Pratt解析，直接编译成逆波兰(RPN)指令序列，
+# 求值时只需一个栈循环，不再经过Python编译器(eval)
+
+Token = namedtuple('Token', ['kind', 'value', 'pos'])
+
+NUMBER = 'number'
+NAME = 'name'
+OPERATOR = 'operator'
+LPAREN = '('
+RPAREN = ')'
+END = 'end'
+
+# 指令操作码
+PUSH = 0
+NEG = 1
+BINARY = 2
+LOAD = 3
+
+# 二元运算符：绑定强度和对应的运算函数（均为左结合）
+BINARY_OPERATORS = {
+    '+': (10, operator.add),
+    '-': (10, operator.sub),
+    '*': (20, operator.mul),
+    '/': (20, operator.truediv),
+}
+UNARY_BINDING = 30  # 一元正负号比乘除结合得更紧，例如 2*-3
+
+_NUMBER_TEXT = re.compile(r'[\d.]+')
+
+class ExpressionError(ValueError):
+    def __init__(self, message, position=None):
+        self.message = message
+        self.position = position  # 出错字符在表达式中的下标(从0开始)
+        if position is not None:
+            message = f"第{position + 1}个字符: {message}"
+        super().__init__(message)
+
+# 一次正则匹配取出一个记号：数字、变量名、运算符/括号，其余非空白字符都是无效字符
+_TOKEN = re.compile(r'([\d.]+)|([^\W\d]\w*)|([-+*/()])|(\S)')
+
+def _scan(source, pos, tokens, ends):
+    # 从pos开始扫描，记号追加到tokens，记号的结束位置追加到ends；遇到错误时抛出ExpressionError
+    append = tokens.append
+    append_end = ends.append
+    for match in _TOKEN.finditer(source, pos):
+        number, name, symbol, other = match.groups()
+        start = match.start()
+        if number is not None:
+            dot = number.find('.')
+            if dot < 0:
+                append(Token(NUMBER, int(number), start))
+                append_end(match.end())
+                continue
+            second = number.find('.', dot + 1)
+            if second >= 0:
+                raise ExpressionError("数字中有多个小数点", start + second)
+            if number == '.':
+                raise ExpressionError("无效的数字", start)
+            append(Token(NUMBER, float(number), start))
+        elif symbol is not None:
+            append(Token(OPERATOR if symbol in BINARY_OPERATORS else symbol, symbol, start))
+        elif name is not None:
+            # 变量名：字母或下划线开头，后面可以跟数字
+            append(Token(NAME, name, start))
+        else:
+            raise ExpressionError(f"无效字符 '{other}'", start)
+        append_end(match.end())
+
+def tokenize(source):
+    tokens = []
+    _scan(source, 0, tokens, [])
+    tokens.append(Token(END, None, len(source)))
+    return tokens
+
+def _common_prefix(a, b):
+    # 两个字符串公共前缀的长度；追加和删除末尾字符是最常见的情况，直接判断
+    if b.startswith(a):
+        return len(a)
+    if a.startswith(b):
+        return len(b)
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+class IncrementalTokenizer:
+    """随输入逐步更新的词法分析结果：只重新扫描被修改位置之后的部分"""
+
+    def __init__(self):
+        self.source = ''
+        self.tokens = []  # 不含END
+        self.ends = []  # 每个记号的结束位置
+        self.error = None  # 扫描到的第一个词法错误
+
+    def update(self, source):
+        changed = _common_prefix(self.source, source)
+        # 保留在修改位置之前结束的记号；恰好在修改位置结束的记号可能和新字符连成一个记号，需要重新扫描
+        keep = bisect_left(self.ends, changed)
+        del self.tokens[keep:]
+        del self.ends[keep:]
+        self.source = source
+        self.error = None
+        try:
+            _scan(source, self.ends[-1] if keep else 0, self.tokens, self.ends)
+        except ExpressionError as e:
+            self.error = e
+        return self
+
+    def snapshot(self):
+        # 返回 (表达式, 含END的记号列表, 词法错误)，可以交给其他线程编译
+        return self.source, self.tokens + [Token(END, None, len(self.source))], self.error
+
+class Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.index = 0
+        self.code = []
+
+    def peek(self):
+        return self.tokens[self.index]
+
+    def advance(self):
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def parse(self):
+        self.expression(0)
+        token = self.peek()
+        if token.kind == RPAREN:
+            raise ExpressionError("多余的')'", token.pos)
+        if token.kind != END:
+            raise ExpressionError("缺少运算符", token.pos)
+        return self.code
+
+    def expression(self, min_binding):
+        self.prefix()
+        while True:
+            token = self.peek()
+            if token.kind != OPERATOR:
+                return
+            binding, function = BINARY_OPERATORS[token.value]
+            if binding <= min_binding:
+                return
+            self.advance()
+            self.expression(binding)
+            self.code.append((BINARY, function, token.pos))
+
+    def prefix(self):
+        token = self.advance()
+        if token.kind == NUMBER:
+            self.code.append((PUSH, token.value, token.pos))
+        elif token.kind == NAME:
+            self.code.append((LOAD, token.value, token.pos))
+        elif token.kind == OPERATOR and token.value in '+-':
+            self.expression(UNARY_BINDING)
+            if token.value == '-':
+                self.code.append((NEG, None, token.pos))
+        elif token.kind == LPAREN:
+            self.expression(0)
+            closing = self.advance()
+            if closing.kind != RPAREN:
+                raise ExpressionError("缺少')'", closing.pos)
+        elif token.kind == END:
+            raise ExpressionError("表达式不完整", token.pos)
+        else:
+            raise ExpressionError(f"意外的'{token.value}'", token.pos)
+
+class Program:
+    """编译好的表达式，可反复求值"""
+
+    __slots__ = ('source', 'code', 'variables', '_integral', '_backend_code')
+
+    def __init__(self, source, code):
+        self.source = source
+        self.code = tuple(code)
+        # 表达式中用到的变量名，按首次出现的顺序
+        self.variables = tuple(dict.fromkeys(argument for opcode, argument, _ in self.code if opcode == LOAD))
+        self._integral = None
+        self._backend_code = {}
+
+    def rebase(self, source):
+        # 返回同一表达式换一种空白写法后的程序，出错位置按source计算；
+        # 两段文本去掉空白后必须完全相同（见calc_api.normalize）
+        if source == self.source:
+            return self
+        old = [i for i, char in enumerate(self.source) if not char.isspace()]
+        new = [i for i, char in enumerate(source) if not char.isspace()]
+        moved = {position: new[k] for k, position in enumerate(old)}
+        return Program(source, [(opcode, argument, moved.get(position, position))
+                                for opcode, argument, position in self.code])
+
+    @property
+    def integral(self):
+        # 常量都是整数且没有除法时，用Python整数计算就是精确的
+        if self._integral is None:
+            self._integral = all(
+                (opcode != PUSH or type(argument) is int) and
+                (opcode != BINARY or argument is not operator.truediv)
+                for opcode, argument, _ in self.code
+            )
+        return self._integral
+
+    def _code_for(self, backend):
+        # 按后端转换数字常量，转换结果按后端名缓存
+        code = self._backend_code.get(backend.name)
+        if code is None:
+            code = tuple(
+                (opcode, backend.literal(_NUMBER_TEXT.match(self.source, position).group()), position)
+                if opcode == PUSH else (opcode, argument, position)
+                for opcode, argument, position in self.code
+            )
+            self._backend_code[backend.name] = code
+        return code
+
+    def evaluate(self, variables=None, backend=None):
+        # backend为None时使用编译时的int/float常量，与float后端相同
+        if backend is None or backend.native:
+            return self._run(self.code, variables)
+        if self.integral and (not variables or
+                              all(type(variables.get(name)) is int for name in self.variables)):
+            # 快速路径：整数运算不需要转换成Decimal/Fraction
+            return self._run(self.code, variables)
+        if variables:
+            variables = {name: backend.convert(value) for name, value in variables.items()}
+        with backend.context():
+            return self._run(self._code_for(backend), variables)
+
+    def _run(self, code, variables):
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        try:
+            for opcode, argument, position in code:
+                if opcode == PUSH:
+                    push(argument)
+                elif opcode == LOAD:
+                    push(variables[argument])
+                elif opcode == NEG:
+                    stack[-1] = -stack[-1]
+                else:
+                    right = pop()
+                    stack[-1] = argument(stack[-1], right)
+        except ZeroDivisionError:
+            raise ExpressionError("除数不能为零", position) from None
+        except InvalidOperation:
+            # Decimal的0/0报告为InvalidOperation
+            if argument is not operator.truediv or right != 0:
+                raise
+            raise ExpressionError("除数不能为零", position) from None
+        except (KeyError, TypeError):
+            if opcode != LOAD:
+                raise
+            raise ExpressionError(f"未定义的变量 '{argument}'", position) from None
+        return stack[0]
+
+def compile_tokens(source, tokens):
+    # 用已经扫描好的记号编译，编译失败时抛出带位置信息的ExpressionError
+    try:
+        return Program(source, Parser(tokens).parse())
+    except RecursionError:
+        raise ExpressionError("括号嵌套过深") from None
+
+def compile_expression(source):
+    return compile_tokens(source, tokenize(source))
+
+def evaluate(source, variables=None, backend=None):
+    return compile_expression(source).evaluate(variables, backend)
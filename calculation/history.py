@@ -0,0 +1,250 @@
+import mmap
+import os
+import struct
+import threading
+from bisect import bisect_left, insort
+
+from calc_api import normalize
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# 计算历史：只追加的日志文件，启动时用mmap映射，不需要先解析整个文件。
+# 每条记录 = 头部(表达式长度, 结果长度, 后端标记长度) + 三段UTF-8文本 + 尾部(整条记录长度)，
+# 尾部长度使历史面板可以从文件末尾向前逐页读取。
+# 表达式索引在后台线程中建立：规范化后的表达式 -> 各后端最近一条记录的位置，
+# 另有按字典序排列的表达式列表，前缀查找用二分定位到连续的一段。
+# 多个计算器进程可能同时写同一个文件：追加时持有文件锁，并以文件的实际末尾为准
+
+MAGIC = b'CHST\x01'
+HEADER = struct.Struct('<IIB')
+FOOTER = struct.Struct('<I')
+
+def default_path():
+    data_dir = os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+    return os.path.join(data_dir, 'little_application', 'calc_history.log')
+
+def lock_file(file):
+    # 进程间的排他锁，阻塞到拿到为止
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+    else:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+
+def unlock_file(file):
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+    else:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+def backend_tag(backend):
+    # 不同数值后端（以及decimal的不同精度）的结果不能互相代替
+    if backend is None:
+        return 'float'
+    if backend.name == 'decimal':
+        return f'decimal:{backend.precision}'
+    return backend.name
+
+class History:
+    def __init__(self, path=None):
+        self.path = path or default_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.file = open(self.path, 'a+b')
+        # 检查和修复文件时持有锁，不会截断别的进程正在写入的记录
+        lock_file(self.file)
+        try:
+            if os.fstat(self.file.fileno()).st_size == 0:
+                self.file.write(MAGIC)
+                self.file.flush()
+            self.size = os.fstat(self.file.fileno()).st_size
+            self.view = None
+            self.view_size = 0
+            self._map()
+            if self.view[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"不是有效的历史文件: {self.path}")
+            if not self._complete(self.view, self.size):
+                self._recover()
+        except ValueError:
+            self.file.close()
+            raise
+        finally:
+            if not self.file.closed:
+                unlock_file(self.file)
+
+        self.lock = threading.Lock()
+        self.offsets = {}  # 规范化后的表达式 -> {后端标记: 最近一条记录的位置}
+        self.keys = []  # 已排序的表达式，用于前缀查找
+        self.ready = threading.Event()
+        threading.Thread(target=self._build_index, args=(self.view, self.size), daemon=True).start()
+
+    def _map(self):
+        # 文件变大后重新映射，旧的映射由仍在使用它的线程自行释放
+        if self.view_size != self.size:
+            self.view = mmap.mmap(self.file.fileno(), self.size, access=mmap.ACCESS_READ)
+            self.view_size = self.size
+        return self.view
+
+    def _record(self, view, offset):
+        # 返回 (表达式, 结果, 后端标记, 下一条记录的位置)
+        expression_length, result_length, tag_length = HEADER.unpack_from(view, offset)
+        start = offset + HEADER.size
+        middle = start + expression_length
+        end = middle + result_length
+        expression = view[start:middle].decode('utf-8')
+        result = view[middle:end].decode('utf-8')
+        tag = view[end:end + tag_length].decode('ascii')
+        return expression, result, tag, end + tag_length + FOOTER.size
+
+    def _complete(self, view, size):
+        # 只检查最后一条记录：尾部长度与头部记录的各段长度一致
+        if size == len(MAGIC):
+            return True
+        if size < len(MAGIC) + HEADER.size + FOOTER.size:
+            return False
+        length, = FOOTER.unpack_from(view, size - FOOTER.size)
+        offset = size - length
+        if length < HEADER.size + FOOTER.size or offset < len(MAGIC):
+            return False
+        expression_length, result_length, tag_length = HEADER.unpack_from(view, offset)
+        return HEADER.size + expression_length + result_length + tag_length + FOOTER.size == length
+
+    def _recover(self):
+        # 上次写入被中断，末尾有不完整的记录：找到最后一条完整记录并截断文件
+        view = self.view
+        offset = len(MAGIC)
+        while True:
+            try:
+                following = self._record(view, offset)[3]
+            except (struct.error, UnicodeDecodeError):
+                break
+            if following > self.size:
+                break
+            offset = following
+        self.view = None
+        view.close()
+        self.file.truncate(offset)
+        self.file.seek(offset)
+        self.size = offset
+        self.view_size = 0
+        self._map()
+
+    def _add(self, key, tag, offset):
+        tags = self.offsets.get(key)
+        if tags is None:
+            tags = self.offsets[key] = {}
+            insort(self.keys, key)
+        if tags.get(tag, -1) < offset:
+            tags[tag] = offset
+
+    def _build_index(self, view, size):
+        # 扫描启动时已有的记录；这期间新追加的记录由append直接加入索引
+        entries = {}
+        offset = len(MAGIC)
+        try:
+            while offset < size:
+                expression, _, tag, following = self._record(view, offset)
+                entries.setdefault(normalize(expression), {})[tag] = offset
+                offset = following
+        except (struct.error, UnicodeDecodeError):
+            # 文件末尾的记录不完整（例如写入时被中断），忽略
+            pass
+        with self.lock:
+            for key, tags in entries.items():
+                for tag, position in tags.items():
+                    existing = self.offsets.setdefault(key, {})
+                    if existing.get(tag, -1) < position:
+                        existing[tag] = position
+            self.keys = sorted(self.offsets)
+        self.ready.set()
+
+    def append(self, expression, result, tag='float'):
+        expression_bytes = expression.encode('utf-8')
+        result_bytes = result.encode('utf-8')
+        tag_bytes = tag.encode('ascii')
+        length = HEADER.size + len(expression_bytes) + len(result_bytes) + len(tag_bytes) + FOOTER.size
+        record = b''.join([HEADER.pack(len(expression_bytes), len(result_bytes), len(tag_bytes)),
+                           expression_bytes, result_bytes, tag_bytes, FOOTER.pack(length)])
+        with self.lock:
+            lock_file(self.file)
+            try:
+                # 别的进程可能已经追加了记录：新记录的位置以文件实际大小为准，
+                # 中间这些记录也加入索引
+                offset = os.fstat(self.file.fileno()).st_size
+                if offset > self.size:
+                    start = self.size
+                    self.size = offset
+                    view = self._map()
+                    while start < offset:
+                        other, _, other_tag, following = self._record(view, start)
+                        self._index(normalize(other), other_tag, start)
+                        start = following
+                self.file.write(record)
+                self.file.flush()
+            finally:
+                unlock_file(self.file)
+            self.size = offset + length
+            self._index(normalize(expression), tag, offset)
+
+    def _index(self, key, tag, offset):
+        # 调用者持有self.lock
+        if self.ready.is_set():
+            self._add(key, tag, offset)
+        else:
+            # 索引还在建立：先记下来，建立完成后合并
+            tags = self.offsets.setdefault(key, {})
+            if tags.get(tag, -1) < offset:
+                tags[tag] = offset
+
+    def lookup(self, expression, tag='float'):
+        # 返回同一表达式在同一后端下最近一次的结果；索引尚未建好或没有记录时返回None
+        if not self.ready.is_set():
+            return None
+        with self.lock:
+            key = normalize(expression)
+            offset = self.offsets.get(key, {}).get(tag)
+            if offset is None:
+                return None
+            stored, result, stored_tag, _ = self._record(self._map(), offset)
+            # 防御性检查：位置指向的不是这个表达式时当作没有记录，由调用者重新计算
+            if normalize(stored) != key or stored_tag != tag:
+                return None
+            return result
+
+    def search(self, prefix, limit=200):
+        # 按字典序返回以prefix开头的表达式及其最近一次的结果；索引尚未建好时返回None，不阻塞调用者
+        if not self.ready.is_set():
+            return None
+        prefix = normalize(prefix)
+        with self.lock:
+            view = self._map()
+            start = bisect_left(self.keys, prefix)
+            matches = []
+            for key in self.keys[start:start + limit]:
+                if not key.startswith(prefix):
+                    break
+                offset = max(self.offsets[key].values())
+                expression, result, tag, _ = self._record(view, offset)
+                matches.append((expression, result, tag))
+            return matches
+
+    def page(self, before=None, limit=100):
+        # 从before位置（默认文件末尾）向前读取最多limit条记录，从新到旧；
+        # 返回 (记录列表, 下一页的before)，没有更早的记录时before为None
+        with self.lock:
+            view = self._map()
+            offset = self.size if before is None else before
+        entries = []
+        while offset > len(MAGIC) and len(entries) < limit:
+            length, = FOOTER.unpack_from(view, offset - FOOTER.size)
+            offset -= length
+            expression, result, tag, _ = self._record(view, offset)
+            entries.append((expression, result, tag))
+        return entries, (offset if offset > len(MAGIC) else None)
+
+    def close(self):
+        self.file.close()
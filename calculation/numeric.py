@@ -0,0 +1,116 @@
+import math
+from contextlib import contextmanager, nullcontext
+from decimal import Decimal, localcontext
+from fractions import Fraction
+
+# 数值后端：决定表达式中的数字字面量和变量用什么类型参与运算。
+# float后端与原来的行为一致；decimal后端按指定精度做十进制运算；
+# fraction后端做精确的有理数运算。只含整数且没有除法的表达式
+# 无论选哪个后端都直接用Python整数计算，结果本来就是精确的
+
+class FloatBackend:
+    name = 'float'
+    native = True  # 直接使用编译时的int/float常量
+
+    def literal(self, text):
+        return float(text) if '.' in text else int(text)
+
+    def convert(self, value):
+        return value
+
+    def context(self):
+        return nullcontext()
+
+class DecimalBackend:
+    name = 'decimal'
+    native = False
+
+    def __init__(self, precision=28):
+        self.precision = precision
+
+    def literal(self, text):
+        return Decimal(text)
+
+    def convert(self, value):
+        if isinstance(value, float):
+            # 用最短的十进制表示，避免把二进制误差带进来
+            return Decimal(repr(value))
+        if isinstance(value, Fraction):
+            return Decimal(value.numerator) / Decimal(value.denominator)
+        return Decimal(value)
+
+    @contextmanager
+    def context(self):
+        with localcontext() as ctx:
+            ctx.prec = self.precision
+            yield ctx
+
+class FractionBackend:
+    name = 'fraction'
+    native = False
+
+    def literal(self, text):
+        return Fraction(text)
+
+    def convert(self, value):
+        if isinstance(value, float):
+            return Fraction(repr(value))
+        return Fraction(value)
+
+    def context(self):
+        return nullcontext()
+
+FLOAT = FloatBackend()
+FRACTION = FractionBackend()
+
+BACKENDS = ('float', 'decimal', 'fraction')
+
+def get_backend(name='float', precision=28):
+    if name == 'float':
+        return FLOAT
+    if name == 'decimal':
+        return DecimalBackend(precision)
+    if name == 'fraction':
+        return FRACTION
+    raise ValueError(f"未知的数值后端: {name}")
+
+def _decimal_text(value):
+    # 去掉多余的0，且不使用科学计数法
+    text = format(value.normalize(), 'f')
+    return '0' if text == '-0' else text
+
+def format_number(result):
+    # 结果的显示规则：整数结果不显示.0，无穷大/非数字直接显示
+    result_type = type(result)
+    if result_type is int:
+        return str(result)
+    if result_type is float:
+        if not math.isfinite(result):
+            return str(result)
+        if result.is_integer():
+            return str(int(result))
+        return str(result)
+    if isinstance(result, Fraction):
+        if result.denominator == 1:
+            return str(result.numerator)
+        # 分母只含因子2和5时是有限小数，精确地按小数显示，否则显示为分数
+        denominator = result.denominator
+        twos = fives = 0
+        while denominator % 2 == 0:
+            denominator //= 2
+            twos += 1
+        while denominator % 5 == 0:
+            denominator //= 5
+            fives += 1
+        if denominator != 1:
+            return str(result)
+        with localcontext() as ctx:
+            ctx.prec = len(str(abs(result.numerator))) + max(twos, fives) + 1
+            return _decimal_text(Decimal(result.numerator) / Decimal(result.denominator))
+    if isinstance(result, Decimal):
+        if not result.is_finite():
+            return str(result)
+        return _decimal_text(result)
+    if result == int(result):
+        result = int(result)
+    return str(result)
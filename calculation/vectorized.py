@@ -0,0 +1,73 @@
+try:
+    import numpy as np
+except ImportError:  # numpy是可选依赖，只有向量化求值需要
+    np = None
+
+from calc_api import compile_cached
+from expression import BINARY, LOAD, NEG, PUSH, ExpressionError
+
+# 向量化求值：表达式只编译一次，每个变量对应一个NumPy数组，
+# 每条RPN指令对整个数组执行一次NumPy运算。
+# 除数为零的元素不会中断整批计算，而是记录在错误掩码中，对应结果为nan
+
+class VectorProgram:
+    def __init__(self, program):
+        if np is None:
+            raise RuntimeError("向量化求值需要安装numpy")
+        self.program = program
+        self.variables = program.variables
+        self.instructions = []
+        for opcode, argument, position in program.code:
+            if opcode == BINARY:
+                argument = _UFUNCS[argument.__name__]
+            self.instructions.append((opcode, argument, position))
+
+    def __call__(self, variables=None, **arrays):
+        # 返回 (结果数组, 错误掩码)，两者形状为所有输入广播后的形状
+        if variables:
+            arrays = {**variables, **arrays}
+        inputs = {}
+        for name in self.variables:
+            if name not in arrays:
+                position = next(pos for op, arg, pos in self.instructions if op == LOAD and arg == name)
+                raise ExpressionError(f"未定义的变量 '{name}'", position)
+            inputs[name] = np.asarray(arrays[name], dtype=np.float64)
+        shape = np.broadcast_shapes(*(value.shape for value in inputs.values()))
+
+        errors = np.zeros(shape, dtype=bool)
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        for opcode, argument, _ in self.instructions:
+            if opcode == PUSH:
+                push(np.float64(argument))
+            elif opcode == LOAD:
+                push(inputs[argument])
+            elif opcode == NEG:
+                stack[-1] = np.negative(stack[-1])
+            elif argument is np.divide:
+                right = pop()
+                zero = right == 0
+                if zero.any():
+                    errors |= zero
+                    stack[-1] = np.divide(stack[-1], np.where(zero, 1.0, right))
+                else:
+                    stack[-1] = np.divide(stack[-1], right)
+            else:
+                right = pop()
+                stack[-1] = argument(stack[-1], right)
+
+        values = np.array(np.broadcast_to(stack[0], shape), dtype=np.float64)
+        values[errors] = np.nan
+        return values, errors
+
+_UFUNCS = {}
+if np is not None:
+    _UFUNCS = {'add': np.add, 'sub': np.subtract, 'mul': np.multiply, 'truediv': np.divide}
+
+def compile_vectorized(source):
+    # 复用calc_api的编译缓存，再转换成NumPy指令
+    return VectorProgram(compile_cached(source))
+
+def evaluate_vectorized(source, variables=None, **arrays):
+    return compile_vectorized(source)(variables, **arrays)
@@ -0,0 +1,208 @@
+import argparse
+import colorsys
+import random
+import time
+
+from board import Board, BoardFullError
+from pathfinding import get_pathfinder
+from snake_core import DIRECTIONS, GAME_DURATION, TICK_RATE, Snake
+
+# 多蛇竞技场：任意数量的AI蛇在任意大小的棋盘上对战。
+# 每个逻辑帧只从所有果实出发做一次反向BFS，得到共享的距离场，
+# 每条蛇只需查看蛇头四个相邻格子的距离即可选出最优方向，
+# 所以每帧的开销只与格子数有关，而与蛇的数量无关
+
+def snake_color(index, count):
+    r, g, b = colorsys.hsv_to_rgb(index / count, 0.75, 0.85)
+    return (int(r * 255), int(g * 255), int(b * 255))
+
+class Arena:
+    def __init__(self, num_snakes=20, width=80, height=60, num_fruits=None, seed=None,
+                 max_ticks=GAME_DURATION * TICK_RATE):
+        if num_fruits is None:
+            num_fruits = max(1, num_snakes // 4)
+        if num_fruits < 1:
+            raise ValueError("至少需要一个果实")
+        self.width = width
+        self.height = height
+        self.max_ticks = max_ticks
+        self.rng = random.Random(seed)
+        self.board = Board(width, height)
+        self.pathfinder = get_pathfinder(width, height)
+
+        self.snakes = []
+        for index in range(num_snakes):
+            # 出生点离墙至少两格，方向随机
+            while True:
+                x = self.rng.randrange(2, width - 2)
+                y = self.rng.randrange(2, height - 2)
+                if self.board.is_free((x, y)):
+                    break
+            snake = Snake(x, y, snake_color(index, num_snakes), board=self.board)
+            snake.direction = self.rng.choice(DIRECTIONS)
+            self.snakes.append(snake)
+        self.alive = list(self.snakes)
+
+        self.fruits = {}  # 果实位置 -> 分值
+        for _ in range(num_fruits):
+            self.place_fruit()
+
+        self.tick = 0
+        self.game_over = False
+
+    def place_fruit(self, points=1):
+        # 放在没有蛇也没有其他果实的空格子上
+        if self.board.free_count() <= len(self.fruits):
+            raise BoardFullError("棋盘已满，没有可放置果实的位置")
+        while True:
+            position = self.board.random_free_cell(self.rng)
+            if position not in self.fruits:
+                self.fruits[position] = points
+                return position
+
+    def choose_move(self, snake, field):
+        # 在相邻格子中选距离果实最近的可达格子，不允许180度转向
+        hx, hy = snake.get_head()
+        reverse = (-snake.direction[0], -snake.direction[1])
+        width, height = self.width, self.height
+        best = None
+        best_distance = 0
+        for direction in DIRECTIONS:
+            if direction == reverse:
+                continue
+            x, y = hx + direction[0], hy + direction[1]
+            if 0 <= x < width and 0 <= y < height:
+                distance = field[y * width + x]
+                if distance >= 0 and (best is None or distance < best_distance):
+                    best = direction
+                    best_distance = distance
+        if best is not None:
+            return best
+
+        # 没有通往果实的路时，随便选一个空的相邻格子
+        possible_directions = [direction for direction in DIRECTIONS
+                               if direction != reverse and
+                               self.board.is_free((hx + direction[0], hy + direction[1]))]
+        if possible_directions:
+            return self.rng.choice(possible_directions)
+        return snake.direction
+
+    def step(self):
+        # 推进一个逻辑帧，返回竞技场是否仍在进行
+        if self.game_over:
+            return False
+        if self.tick >= self.max_ticks or not self.alive:
+            self.game_over = True
+            return False
+
+        board = self.board
+        # 所有蛇共用的距离场：从果实出发，蛇身占用的格子不可通过
+        field = self.pathfinder.distance_field(list(self.fruits), board.occupancy)
+        for snake in self.alive:
+            snake.change_direction(self.choose_move(snake, field))
+
+        # 所有蛇同时移动：先根据移动前的棋盘判断碰撞，再统一更新
+        occupancy = board.occupancy
+        targets = {}
+        dead = []
+        for snake in self.alive:
+            hx, hy = snake.get_head()
+            new_head = (hx + snake.direction[0], hy + snake.direction[1])
+            # 撞墙，或撞到任何蛇的身体（包括自己和其他蛇的头、尾）
+            if not board.in_bounds(new_head) or occupancy[board.index(new_head)]:
+                dead.append(snake)
+            else:
+                targets.setdefault(new_head, []).append(snake)
+        for snakes in targets.values():
+            if len(snakes) > 1:
+                # 两条以上的蛇同时冲进同一个格子，头对头相撞，全部出局
+                dead.extend(snakes)
+
+        for snake in dead:
+            while snake.body:
+                snake.pop_tail()
+        dead = set(dead)
+        self.alive = [snake for snake in self.alive if snake not in dead]
+
+        for snake in self.alive:
+            hx, hy = snake.get_head()
+            snake.push_head((hx + snake.direction[0], hy + snake.direction[1]))
+            if not snake.growth_pending:
+                snake.pop_tail()
+            else:
+                snake.growth_pending = False
+
+        # 检查是否吃到果实
+        try:
+            for snake in self.alive:
+                points = self.fruits.pop(snake.get_head(), None)
+                if points is not None:
+                    snake.grow()
+                    snake.score += points
+                    self.place_fruit(points)
+        except BoardFullError:
+            self.game_over = True
+
+        self.tick += 1
+        return not self.game_over
+
+    def run(self):
+        while self.step():
+            pass
+        return self
+
+def show(arena, fps):
+    # 简单的窗口显示，格子大小按窗口尺寸自动调整
+    import pygame
+
+    pygame.init()
+    cell = max(2, min(1200 // arena.width, 900 // arena.height))
+    screen = pygame.display.set_mode((arena.width * cell, arena.height * cell))
+    pygame.display.set_caption('贪吃蛇竞技场')
+    clock = pygame.time.Clock()
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+        if not arena.step():
+            running = running and arena.tick < arena.max_ticks and bool(arena.alive)
+        screen.fill((255, 255, 255))
+        for x, y in arena.fruits:
+            pygame.draw.rect(screen, (255, 200, 0), (x * cell, y * cell, cell, cell))
+        for snake in arena.alive:
+            for x, y in snake.body:
+                pygame.draw.rect(screen, snake.color, (x * cell, y * cell, cell, cell))
+        pygame.display.flip()
+        clock.tick(fps)
+    pygame.quit()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='多蛇竞技场')
+    parser.add_argument('-n', '--snakes', type=int, default=24, help='AI蛇数量')
+    parser.add_argument('--width', type=int, default=120, help='棋盘宽度（格）')
+    parser.add_argument('--height', type=int, default=90, help='棋盘高度（格）')
+    parser.add_argument('--fruits', type=int, help='同时存在的果实数量，默认为蛇数量的四分之一')
+    parser.add_argument('--ticks', type=int, default=GAME_DURATION * TICK_RATE, help='最多运行的逻辑帧数')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--show', action='store_true', help='打开窗口显示对战过程')
+    parser.add_argument('--fps', type=int, default=30, help='显示时的帧率')
+    args = parser.parse_args(argv)
+    if args.fruits is not None and args.fruits < 1:
+        parser.error('--fruits 至少为1')
+
+    arena = Arena(args.snakes, args.width, args.height, args.fruits, args.seed, args.ticks)
+    if args.show:
+        show(arena, args.fps)
+        return
+
+    start = time.perf_counter()
+    arena.run()
+    elapsed = time.perf_counter() - start
+    print(f'{args.snakes}条蛇 {args.width}x{args.height}: {arena.tick}帧, {elapsed:.2f}秒, '
+          f'{arena.tick / elapsed:.0f} 帧/秒, 存活{len(arena.alive)}条')
+    ranking = sorted(arena.snakes, key=lambda snake: snake.score, reverse=True)
+    print('最高得分: ' + ', '.join(str(snake.score) for snake in ranking[:10]))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# 位棋盘：用一个Python整数表示整个棋盘，第 y * width + x 位对应一个格子。
+# 泛洪填充每扩展一步只需要几次移位和与/或运算，不需要逐格遍历
+
+# 把occupancy中每格的计数转换成'0'/'1'字符，再整体解析为整数
+_BITS = bytes([ord('0')] + [ord('1')] * 255)
+
+class BitBoard:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.full = (1 << self.size) - 1
+        first_column = 0
+        for y in range(height):
+            first_column |= 1 << (y * width)
+        # 左右移位时去掉跨行绕回的格子
+        self.not_first_column = self.full & ~first_column
+        self.not_last_column = self.full & ~(first_column << (width - 1))
+
+    def from_occupancy(self, occupancy):
+        # occupancy为按格子下标排列的占用表（bytearray），返回被占用格子的位集合
+        return int(occupancy.translate(_BITS)[::-1], 2)
+
+    def expand(self, bits):
+        # 所有格子向上下左右各扩展一格
+        width = self.width
+        return (bits | ((bits << 1) & self.not_first_column) | ((bits >> 1) & self.not_last_column) |
+                ((bits << width) & self.full) | (bits >> width))
+
+    def flood(self, start, free, limit=None):
+        # 从start出发在free中泛洪，返回可到达的格子（含start）；
+        # 可到达的格子数达到limit时提前停止
+        reach = start
+        while True:
+            grown = reach | (self.expand(reach) & free)
+            if grown == reach:
+                return reach
+            reach = grown
+            if limit is not None and reach.bit_count() >= limit:
+                return reach
+
+_bitboards = {}
+
+def get_bitboard(width, height):
+    # 同一尺寸的棋盘共用一个位棋盘，掩码只计算一次
+    bitboard = _bitboards.get((width, height))
+    if bitboard is None:
+        bitboard = _bitboards[(width, height)] = BitBoard(width, height)
+    return bitboard
@@ -0,0 +1,74 @@
+import random
+from collections import deque
+
+# 棋盘占用表：所有蛇共享，格子用一维下标 y * width + x 表示，
+# 每格记录被多少段蛇身占用，蛇头前进和蛇尾收缩时增量更新。
+# 同时维护空闲格子索引（数组 + 下标表，删除时与末尾交换），可O(1)随机取空格。
+# version和recent记录最近新占用的格子，AI据此检查已规划的路径是否被挡住
+
+RECENT_CHANGES = 64
+
+class BoardFullError(Exception):
+    pass
+
+class Board:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.occupancy = bytearray(self.size)
+        self.free = list(range(self.size))
+        self.free_slot = list(range(self.size))  # 格子在free中的位置，被占用时为-1
+        self.version = 0  # 累计occupy次数
+        self.recent = deque(maxlen=RECENT_CHANGES)  # 最近occupy的格子下标
+
+    def index(self, pos):
+        return pos[1] * self.width + pos[0]
+
+    def in_bounds(self, pos):
+        return 0 <= pos[0] < self.width and 0 <= pos[1] < self.height
+
+    def is_occupied(self, pos):
+        return self.occupancy[pos[1] * self.width + pos[0]] != 0
+
+    def is_free(self, pos):
+        # 在棋盘内且没有被任何蛇占用
+        x, y = pos
+        return (0 <= x < self.width and 0 <= y < self.height and
+                not self.occupancy[y * self.width + x])
+
+    def occupy(self, index):
+        if not self.occupancy[index]:
+            # 从空闲数组中移除：用末尾元素填补空位
+            slot = self.free_slot[index]
+            last = self.free.pop()
+            if last != index:
+                self.free[slot] = last
+                self.free_slot[last] = slot
+            self.free_slot[index] = -1
+        self.occupancy[index] += 1
+        self.version += 1
+        self.recent.append(index)
+
+    def occupied_since(self, version):
+        # 返回version之后新占用的格子下标；记录已被覆盖时返回None，需要完整检查
+        missed = self.version - version
+        if missed > len(self.recent):
+            return None
+        return [self.recent[i] for i in range(len(self.recent) - missed, len(self.recent))]
+
+    def release(self, index):
+        self.occupancy[index] -= 1
+        if not self.occupancy[index]:
+            self.free_slot[index] = len(self.free)
+            self.free.append(index)
+
+    def free_count(self):
+        return len(self.free)
+
+    def random_free_cell(self, rng=random):
+        # 等概率返回一个空格子的坐标，棋盘已满时抛出BoardFullError
+        if not self.free:
+            raise BoardFullError("棋盘已满，没有可放置果实的位置")
+        index = self.free[rng.randrange(len(self.free))]
+        return (index % self.width, index // self.width)
@@ -0,0 +1,160 @@
+import argparse
+import asyncio
+import random
+import time
+from collections import deque
+
+from game_server import (
+    AI_MOVED, AI_SHRANK, FRAME, GAME_OVER, HELLO, MAGIC, PLAYER_MOVED, PLAYER_SHRANK, VERSION, GameServer,
+)
+from snake_core import DIFFICULTIES, DIRECTIONS, TICK_RATE
+
+# 压力测试：在本机同时启动大量模拟客户端连接game_server，
+# 每个客户端根据收到的增量还原棋盘，贪心地朝果实移动，最后统计帧间隔和得分
+
+class Stats:
+    def __init__(self):
+        self.connected = 0
+        self.finished = 0
+        self.failed = 0
+        self.frames = 0
+        self.intervals = []  # 相邻两帧到达的间隔(秒)
+        self.scores = []
+        self.tick_rate = TICK_RATE  # 服务器的逻辑帧率，从HELLO中读取
+
+async def open_client(args):
+    if args.unix:
+        return await asyncio.open_unix_connection(args.unix)
+    return await asyncio.open_connection(args.host, args.port)
+
+def choose_direction(head, direction, fruit, occupied, width, height):
+    # 在不会撞墙、撞到蛇身且不掉头的方向中，选离果实最近的
+    best = None
+    best_distance = None
+    for code, (dx, dy) in enumerate(DIRECTIONS):
+        if (dx, dy) == (-direction[0], -direction[1]):
+            continue
+        x, y = head[0] + dx, head[1] + dy
+        if not (0 <= x < width and 0 <= y < height) or (x, y) in occupied:
+            continue
+        distance = abs(x - fruit[0]) + abs(y - fruit[1])
+        if best is None or distance < best_distance:
+            best = code
+            best_distance = distance
+    return best
+
+async def bot(args, stats, rng):
+    try:
+        reader, writer = await open_client(args)
+    except OSError:
+        stats.failed += 1
+        return
+    stats.connected += 1
+    try:
+        writer.write(bytes([rng.randrange(len(DIFFICULTIES)) if args.difficulty is None
+                            else DIFFICULTIES.index(args.difficulty)]))
+        hello = HELLO.unpack(await reader.readexactly(HELLO.size))
+        if hello[0] != MAGIC or hello[1] != VERSION:
+            raise ConnectionError("不是贪吃蛇服务器或协议版本不同")
+        width, height = hello[4], hello[5]
+        stats.tick_rate = hello[6]
+        player = deque([divmod(hello[7], width)[::-1]])
+        ai = deque([divmod(hello[8], width)[::-1]])
+        occupied = {player[0]: 1, ai[0]: 1}
+        direction = (1, 0)
+        last = time.perf_counter()
+        frames = 0
+        player_score = 0
+
+        def advance(body, head, shrank):
+            body.appendleft(head)
+            occupied[head] = occupied.get(head, 0) + 1
+            if shrank:
+                tail = body.pop()
+                occupied[tail] -= 1
+                if not occupied[tail]:
+                    del occupied[tail]
+
+        while frames < args.ticks:
+            tick, flags, player_head, ai_head, fruit, _, player_score, _ = FRAME.unpack(
+                await reader.readexactly(FRAME.size))
+            now = time.perf_counter()
+            stats.intervals.append(now - last)
+            last = now
+            frames += 1
+            if flags & PLAYER_MOVED:
+                direction = (player_head % width - player[0][0], player_head // width - player[0][1])
+                advance(player, (player_head % width, player_head // width), flags & PLAYER_SHRANK)
+            if flags & AI_MOVED:
+                advance(ai, (ai_head % width, ai_head // width), flags & AI_SHRANK)
+            if flags & GAME_OVER:
+                break
+            code = choose_direction(player[0], direction, (fruit % width, fruit // width), occupied, width, height)
+            if code is not None and DIRECTIONS[code] != direction:
+                writer.write(bytes([code]))
+        stats.frames += frames
+        stats.scores.append(player_score)
+        stats.finished += 1
+    except (asyncio.IncompleteReadError, ConnectionError):
+        stats.failed += 1
+    finally:
+        writer.close()
+
+async def run(args):
+    server = listener = None
+    if args.serve:
+        # 在同一进程中启动服务器，方便直接测试
+        server = GameServer(args.workers, args.tick_rate, args.seed)
+        listener = await server.start(args.host, 0 if args.unix is None else None, args.unix)
+        if args.unix is None:
+            args.port = listener.sockets[0].getsockname()[1]
+
+    stats = Stats()
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    tasks = []
+    for _ in range(args.clients):
+        tasks.append(asyncio.create_task(bot(args, stats, random.Random(rng.getrandbits(32)))))
+        if args.ramp:
+            await asyncio.sleep(args.ramp)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    if listener is not None:
+        # 客户端断开后，服务器在下一个逻辑帧结束对应的对局
+        while server.active:
+            await asyncio.sleep(0.01)
+        listener.close()
+        await listener.wait_closed()
+        server.close()
+
+    intervals = sorted(stats.intervals)
+    expected = 1000 / stats.tick_rate
+    print(f'{args.clients}个客户端: 连接 {stats.connected}  完成 {stats.finished}  失败 {stats.failed}  '
+          f'{elapsed:.2f}秒  共{stats.frames}帧, {stats.frames / elapsed:.0f} 帧/秒')
+    if intervals:
+        p50 = intervals[len(intervals) // 2] * 1000
+        p99 = intervals[min(len(intervals) - 1, len(intervals) * 99 // 100)] * 1000
+        print(f'帧间隔 期望 {expected:.1f}毫秒  p50 {p50:.1f}毫秒  p99 {p99:.1f}毫秒  '
+              f'最大 {intervals[-1] * 1000:.1f}毫秒')
+    if stats.scores:
+        print(f'平均得分 {sum(stats.scores) / len(stats.scores):.2f}')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='用大量模拟客户端压测贪吃蛇服务器')
+    parser.add_argument('-n', '--clients', type=int, default=200, help='客户端数量')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', metavar='PATH', help='连接Unix套接字而不是TCP端口')
+    parser.add_argument('-t', '--ticks', type=int, default=200, help='每个客户端最多接收的帧数')
+    parser.add_argument('-d', '--difficulty', choices=DIFFICULTIES, help='对手AI难度，默认随机')
+    parser.add_argument('--ramp', type=float, default=0.0, help='相邻两个客户端连接的间隔(秒)')
+    parser.add_argument('-s', '--seed', type=int, default=0)
+    parser.add_argument('--serve', action='store_true', help='在本进程中启动服务器')
+    parser.add_argument('-j', '--workers', type=int, default=0, help='--serve时运行对局的进程数')
+    parser.add_argument('--tick-rate', type=int, default=TICK_RATE, help='--serve时的逻辑帧率')
+    args = parser.parse_args(argv)
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
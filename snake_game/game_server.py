@@ -0,0 +1,271 @@
+import argparse
+import asyncio
+import random
+import struct
+from concurrent.futures import ProcessPoolExecutor
+
+from snake_core import DIFFICULTIES, DIRECTIONS, GRID_HEIGHT, GRID_WIDTH, TICK_RATE, DirectionBuffer, Game
+
+# 多局对战服务器：很多局同时进行，所有对局按服务器的逻辑帧率同步推进。
+# 客户端通过本地TCP或Unix套接字连接，控制玩家蛇，对手是服务器上的AI蛇。
+#
+# 协议（小端）：
+#   客户端连接后先发送1字节AI难度（DIFFICULTIES中的下标），之后每个字节是一个方向（DIRECTIONS中的下标）
+#   服务器回复HELLO（种子、棋盘大小、帧率和初始位置），之后每个逻辑帧发送一个FRAME增量：
+#   两条蛇的新蛇头、是否前进/收缩了蛇尾、果实位置和分值、双方得分，客户端据此还原完整状态
+#
+# 指定工作进程时，每局固定分配给一个进程，完整的对局（包括AI在逻辑帧之间保留的规划）
+# 都保存在该进程中。每个逻辑帧每个进程只往返一次：发送各局收到的输入，取回各局的FRAME，
+# 寻路和模拟都不占用事件循环
+
+MAGIC = b'SNKS'
+VERSION = 2
+# magic, 版本, 种子, AI难度, 宽, 高, 帧率, 玩家蛇头, AI蛇头, 果实, 果实分值
+HELLO = struct.Struct('<4sBQBHHHHHHB')
+# 帧号, 标志, 玩家蛇头, AI蛇头, 果实, 果实分值, 玩家得分, AI得分
+FRAME = struct.Struct('<HBHHHBHH')
+
+PLAYER_MOVED = 1
+PLAYER_SHRANK = 2  # 前进后收缩了蛇尾（没有生长）
+AI_MOVED = 4
+AI_SHRANK = 8
+GAME_OVER = 128
+
+MAX_PENDING = 64 * 1024  # 客户端来不及接收、积压超过这个字节数时断开
+
+class Match:
+    """一局对战的完整状态，在事件循环或工作进程中推进"""
+
+    def __init__(self, difficulty, seed, tick_rate):
+        self.game = Game(difficulty, seed=seed, tick_rate=tick_rate)
+        self.inputs = DirectionBuffer()
+
+    def hello(self):
+        game = self.game
+        board = game.board
+        return HELLO.pack(MAGIC, VERSION, game.seed, DIFFICULTIES.index(game.difficulty),
+                          GRID_WIDTH, GRID_HEIGHT, game.tick_rate,
+                          board.index(game.player_snake.get_head()), board.index(game.ai_snake.get_head()),
+                          board.index(game.fruit.position), game.fruit.points)
+
+    def advance(self, codes):
+        # codes为上一帧以来客户端发来的方向；推进一个逻辑帧，返回 (对局是否继续, FRAME)
+        game = self.game
+        player, ai = game.player_snake, game.ai_snake
+        for code in codes:
+            self.inputs.push(DIRECTIONS[code & 3], player.direction)
+        before = (player.get_head(), len(player.body), ai.get_head(), len(ai.body))
+        running = game.step(self.inputs.pop())
+
+        board = game.board
+        flags = GAME_OVER if game.game_over else 0
+        if player.get_head() != before[0]:
+            flags |= PLAYER_MOVED
+            if len(player.body) == before[1]:
+                flags |= PLAYER_SHRANK
+        if ai.get_head() != before[2]:
+            flags |= AI_MOVED
+            if len(ai.body) == before[3]:
+                flags |= AI_SHRANK
+        return running, FRAME.pack(game.tick & 0xFFFF, flags, board.index(player.get_head()),
+                                   board.index(ai.get_head()), board.index(game.fruit.position),
+                                   game.fruit.points, player.score, ai.score)
+
+def step_matches(matches, steps, ends):
+    # 推进steps中的各局 {对局编号: 方向列表}，丢弃ends中已断开的对局；
+    # 返回 {对局编号: (是否继续, FRAME)}，结束的对局同时被移除
+    for match_id in ends:
+        matches.pop(match_id, None)
+    frames = {}
+    for match_id, codes in steps.items():
+        running, frame = frames[match_id] = matches[match_id].advance(codes)
+        if not running:
+            del matches[match_id]
+    return frames
+
+# 工作进程中的对局：对局编号 -> Match
+_matches = {}
+
+def start_in_worker(match_id, difficulty, seed, tick_rate):
+    match = _matches[match_id] = Match(difficulty, seed, tick_rate)
+    return match.hello()
+
+def step_in_worker(steps, ends):
+    return step_matches(_matches, steps, ends)
+
+class Session:
+    def __init__(self, worker, writer):
+        self.worker = worker  # 对局所在的工作进程下标，-1表示在事件循环中
+        self.writer = writer
+        self.codes = []  # 上一帧以来收到的方向
+        self.reader = None
+        self.done = asyncio.get_running_loop().create_future()
+
+class GameServer:
+    def __init__(self, workers=0, tick_rate=TICK_RATE, seed=None):
+        # workers为0时在事件循环中直接推进对局；每个工作进程是单独的执行器，对局固定在其中一个
+        self.pools = [ProcessPoolExecutor(1) for _ in range(workers)]
+        self.tick_rate = tick_rate
+        self.seeds = random.Random(seed)
+        self.local = {}  # 在事件循环中推进的对局
+        self.sessions = {}  # 对局编号 -> Session
+        self.loads = [0] * workers  # 每个工作进程上的对局数
+        self.ends = [[] for _ in range(workers)]  # 下一帧要通知工作进程丢弃的对局
+        self.next_id = 0
+        self.ticker = None
+        self.active = 0
+        self.finished = 0
+        self.ticks = 0
+
+    async def read_inputs(self, reader, session):
+        # 读取客户端的方向输入，连接断开时返回
+        while True:
+            data = await reader.read(256)
+            if not data:
+                return
+            session.codes.extend(data)
+
+    def finish(self, match_id, session, notify):
+        # notify为True时对局还在工作进程中，下一帧通知它丢弃
+        del self.sessions[match_id]
+        if session.worker >= 0:
+            self.loads[session.worker] -= 1
+            if notify:
+                self.ends[session.worker].append(match_id)
+        else:
+            self.local.pop(match_id, None)
+        session.done.set_result(None)
+
+    async def step_worker(self, worker, steps):
+        ends, self.ends[worker] = self.ends[worker], []
+        if not steps and not ends:
+            return {}
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pools[worker], step_in_worker, steps, ends)
+
+    async def tick(self):
+        # 推进所有对局一帧：断开的对局直接结束，其余的按所在位置分组，每个工作进程一次调用
+        steps = [{} for _ in self.pools]
+        local_steps = {}
+        for match_id, session in list(self.sessions.items()):
+            if session.reader.done():
+                self.finish(match_id, session, True)
+                continue
+            codes, session.codes = session.codes, []
+            (steps[session.worker] if session.worker >= 0 else local_steps)[match_id] = codes
+        frames = step_matches(self.local, local_steps, ())
+        for result in await asyncio.gather(*(self.step_worker(i, s) for i, s in enumerate(steps))):
+            frames.update(result)
+
+        for match_id, (running, frame) in frames.items():
+            session = self.sessions.get(match_id)
+            if session is None:
+                continue
+            self.ticks += 1
+            session.writer.write(frame)
+            if not running:
+                self.finish(match_id, session, False)
+            elif session.writer.transport.get_write_buffer_size() > MAX_PENDING:
+                self.finish(match_id, session, True)
+
+    async def run_ticks(self):
+        loop = asyncio.get_running_loop()
+        interval = 1 / self.tick_rate
+        deadline = loop.time()
+        while True:
+            deadline += interval
+            delay = deadline - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self.tick()
+
+    async def handle(self, reader, writer):
+        try:
+            code = (await reader.readexactly(1))[0]
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        difficulty = DIFFICULTIES[code] if code < len(DIFFICULTIES) else "一般"
+        seed = self.seeds.getrandbits(63)
+        match_id = self.next_id
+        self.next_id += 1
+
+        if self.pools:
+            worker = self.loads.index(min(self.loads))
+            self.loads[worker] += 1
+            loop = asyncio.get_running_loop()
+            hello = await loop.run_in_executor(self.pools[worker], start_in_worker,
+                                               match_id, difficulty, seed, self.tick_rate)
+        else:
+            worker = -1
+            match = self.local[match_id] = Match(difficulty, seed, self.tick_rate)
+            hello = match.hello()
+        writer.write(hello)
+
+        self.active += 1
+        session = Session(worker, writer)
+        session.reader = asyncio.create_task(self.read_inputs(reader, session))
+        self.sessions[match_id] = session
+        try:
+            await session.done
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            session.reader.cancel()
+            writer.close()
+            self.active -= 1
+            self.finished += 1
+
+    async def start(self, host='127.0.0.1', port=8765, unix_path=None):
+        self.ticker = asyncio.create_task(self.run_ticks())
+        if unix_path is not None:
+            return await asyncio.start_unix_server(self.handle, unix_path)
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def report(self, interval):
+        # 定期打印进行中的对局数和每秒推进的逻辑帧数
+        last = self.ticks
+        while True:
+            await asyncio.sleep(interval)
+            print(f'进行中 {self.active} 局  已结束 {self.finished} 局  '
+                  f'{(self.ticks - last) / interval:.0f} 帧/秒', flush=True)
+            last = self.ticks
+
+    def close(self):
+        if self.ticker is not None:
+            self.ticker.cancel()
+        for pool in self.pools:
+            pool.shutdown(cancel_futures=True)
+
+async def serve(args):
+    server = GameServer(args.workers, args.tick_rate, args.seed)
+    listener = await server.start(args.host, args.port, args.unix)
+    where = args.unix or f'{args.host}:{listener.sockets[0].getsockname()[1]}'
+    print(f'贪吃蛇服务器已启动: {where}  对局进程数 {args.workers}', flush=True)
+    reporter = asyncio.create_task(server.report(args.report)) if args.report > 0 else None
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+        server.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='贪吃蛇多局对战服务器')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', metavar='PATH', help='监听Unix套接字而不是TCP端口')
+    parser.add_argument('-j', '--workers', type=int, default=0, help='运行对局的进程数，0表示在事件循环中运行')
+    parser.add_argument('--tick-rate', type=int, default=TICK_RATE, help='每秒逻辑帧数')
+    parser.add_argument('-s', '--seed', type=int, help='生成每局种子的随机种子')
+    parser.add_argument('--report', type=float, default=5.0, help='统计信息的打印间隔(秒)，0表示不打印')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+from pathfinding import DIRECTIONS
+
+# 哈密顿回路AI：每种棋盘尺寸只构造一次经过所有格子各一次的回路，
+# 保存为按格子下标排列的回路序号表和后继表。沿回路前进永远不会撞到自己，
+# 能证明不会把自己困住时才抄近路跳过回路上的一段，每一步只检查四个相邻格子
+
+class HamiltonCycle:
+    def __init__(self, width, height):
+        # 宽和高都是奇数的棋盘不存在哈密顿回路
+        if width < 2 or height < 2 or (width % 2 and height % 2):
+            raise ValueError(f"{width}x{height}的棋盘没有哈密顿回路")
+        self.width = width
+        self.height = height
+        self.size = width * height
+
+        self.cells = self._build(width, height)  # cells[k]是回路上第k个格子的下标
+        self.order = [0] * self.size  # 格子下标 -> 在回路上的序号
+        for k, cell in enumerate(self.cells):
+            self.order[cell] = k
+        self.successor = [0] * self.size  # 格子下标 -> 回路上的下一个格子
+        for k, cell in enumerate(self.cells):
+            self.successor[cell] = self.cells[(k + 1) % self.size]
+
+        # 每个格子的相邻格子及对应方向
+        self.neighbours = []
+        for index in range(self.size):
+            x, y = index % width, index // width
+            self.neighbours.append(tuple(((y + dy) * width + x + dx, (dx, dy)) for dx, dy in DIRECTIONS
+                                         if 0 <= x + dx < width and 0 <= y + dy < height))
+
+    def _build(self, width, height):
+        if height % 2:
+            # 高为奇数时宽一定是偶数：按转置的棋盘构造，再换回原来的坐标
+            return [(index % height) * width + index // height for index in self._build(height, width)]
+        # 第0行从左走到右，然后在第1列及以右来回蛇形向下，最后一行停在第1列，
+        # 再沿第0列向上回到起点。高为偶数保证最后一行是从右往左走的
+        cells = [x for x in range(width)]
+        for y in range(1, height):
+            columns = range(1, width) if y % 2 == 0 else range(width - 1, 0, -1)
+            cells.extend(y * width + x for x in columns)
+        cells.extend(y * width for y in range(height - 1, 0, -1))
+        return cells
+
+    def distance(self, start, end):
+        # 沿回路从start向前走到end的步数
+        return (self.order[end] - self.order[start]) % self.size
+
+_cycles = {}
+
+def get_cycle(width, height):
+    # 同一尺寸的棋盘共用一个回路，只构造一次；没有哈密顿回路的尺寸返回None
+    if (width, height) not in _cycles:
+        try:
+            _cycles[(width, height)] = HamiltonCycle(width, height)
+        except ValueError:
+            _cycles[(width, height)] = None
+    return _cycles[(width, height)]
+
+class CyclePlanner:
+    """沿哈密顿回路前进的AI，在逻辑帧之间记录蛇身是否已按回路顺序排列"""
+
+    def __init__(self, cycle):
+        self.cycle = cycle
+        self.expected = -1  # 上一步选择进入的格子
+        self.aligned = 0  # 连续沿回路向前的步数
+        self.shortcuts = 0
+
+    def next_move(self, snake, fruit_pos, blocked):
+        # 返回下一步的方向；四周都走不了时返回None
+        cycle = self.cycle
+        width = cycle.width
+        size = cycle.size
+        order = cycle.order
+        body = snake.body
+        head = body[0][1] * width + body[0][0]
+        tail = body[-1][1] * width + body[-1][0]
+        length = len(body)
+
+        # 上一步没有按选择的方向走（例如退回了求生走法）时，蛇身不再一定按回路顺序排列
+        self.aligned = self.aligned + 1 if head == self.expected else 0
+
+        head_order = order[head]
+        limit = 1
+        if self.aligned >= length - 1 and length <= size // 2:
+            # 蛇身从蛇尾到蛇头沿回路依次排列，蛇头前方直到蛇尾都是空格：
+            # 只要跳过之后前方还留有多于蛇长的空格，就可以跳过回路的一段直接靠近果实
+            to_tail = (order[tail] - head_order) % size or size
+            to_fruit = (order[fruit_pos[1] * width + fruit_pos[0]] - head_order) % size or size
+            room = to_tail - length - 3
+            if to_fruit < to_tail:
+                room -= 1  # 吃到果实后蛇会变长一格
+            limit = max(1, min(room, to_fruit))
+
+        reverse = (-snake.direction[0], -snake.direction[1])
+        best = -1
+        best_direction = None
+        best_distance = 0
+        for cell, direction in cycle.neighbours[head]:
+            if direction == reverse or blocked[cell]:
+                continue
+            distance = (order[cell] - head_order) % size
+            if best_distance < distance <= limit:
+                best = cell
+                best_direction = direction
+                best_distance = distance
+        if best_distance > 1:
+            self.shortcuts += 1
+        self.expected = best
+        return best_direction
@@ -0,0 +1,64 @@
+import argparse
+import os
+import time
+from multiprocessing import Pool
+
+import replay
+from snake_core import DIFFICULTIES, Game
+
+# 无窗口批量对战：AI控制双方，以CPU允许的最快速度跑完整局并统计结果
+
+def play_match(args):
+    difficulty, player_difficulty, seed, record_dir = args
+    game = Game(difficulty, player_difficulty=player_difficulty, seed=seed).run()
+    if record_dir is not None and game.collided:
+        # 保存撞死的对局，之后可以用replay.py复现；文件名带上双方难度，
+        # 同一种子在不同难度下的对局不会互相覆盖。未指定种子时用游戏实际使用的种子
+        name = f'{replay.difficulty_code(difficulty)}-{replay.difficulty_code(player_difficulty)}-{game.seed}.snkr'
+        replay.save(game, os.path.join(record_dir, name))
+    return (game.winner(), game.player_snake.score, game.ai_snake.score, game.tick)
+
+def run_matches(matches, difficulty, player_difficulty, workers=1, seed=None, record_dir=None):
+    # 指定seed时第i局使用seed + i，整批结果可复现
+    jobs = [(difficulty, player_difficulty, None if seed is None else seed + i, record_dir)
+            for i in range(matches)]
+    if workers > 1:
+        with Pool(workers) as pool:
+            return pool.map(play_match, jobs, chunksize=max(1, matches // (workers * 8)))
+    return [play_match(job) for job in jobs]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='贪吃蛇无窗口批量对战')
+    parser.add_argument('-n', '--matches', type=int, default=1000, help='对局数量')
+    parser.add_argument('-d', '--difficulty', choices=DIFFICULTIES, action='append',
+                        help='AI蛇难度，可重复指定；默认跑全部难度')
+    parser.add_argument('-p', '--player-difficulty', choices=DIFFICULTIES, default='困难',
+                        help='代替玩家的AI难度')
+    parser.add_argument('-j', '--workers', type=int, default=1, help='并行进程数')
+    parser.add_argument('-s', '--seed', type=int, help='起始随机种子，第i局使用seed + i')
+    parser.add_argument('--record-failures', metavar='DIR', help='把因碰撞结束的对局保存为回放文件')
+    args = parser.parse_args(argv)
+
+    if args.record_failures:
+        os.makedirs(args.record_failures, exist_ok=True)
+
+    for difficulty in args.difficulty or DIFFICULTIES:
+        start = time.perf_counter()
+        results = run_matches(args.matches, difficulty, args.player_difficulty, args.workers,
+                              args.seed, args.record_failures)
+        elapsed = time.perf_counter() - start
+
+        wins = {"玩家": 0, "AI": 0, None: 0}
+        for winner, _, _, _ in results:
+            wins[winner] += 1
+        avg_player = sum(r[1] for r in results) / len(results)
+        avg_ai = sum(r[2] for r in results) / len(results)
+        avg_ticks = sum(r[3] for r in results) / len(results)
+
+        print(f'难度 {difficulty} vs {args.player_difficulty}: {len(results)} 局, '
+              f'{elapsed:.2f}秒, {len(results) / elapsed:.1f} 局/秒')
+        print(f'  玩家胜 {wins["玩家"]}  AI胜 {wins["AI"]}  平局 {wins[None]}  '
+              f'平均得分 玩家 {avg_player:.2f} AI {avg_ai:.2f}  平均帧数 {avg_ticks:.0f}')
+
+if __name__ == "__main__":
+    main()
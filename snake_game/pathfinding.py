@@ -0,0 +1,267 @@
+import heapq
+from collections import deque
+
+# 寻路引擎：格子用一维下标 y * width + x 表示，
+# 通过前驱表和访问标记代数(generation)避免每次搜索复制路径或清空数组
+
+DIRECTIONS = ((0, 1), (1, 0), (0, -1), (-1, 0))
+
+class PathFinder:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.parent = [-1] * self.size
+        self.cost = [0] * self.size
+        self.seen = [0] * self.size
+        self.generation = 0
+
+        # 预先计算每个格子的相邻格子，顺序与DIRECTIONS一致，保证与原BFS相同的选路结果
+        self.neighbours = []
+        for index in range(self.size):
+            x, y = index % width, index // width
+            cells = []
+            for dx, dy in DIRECTIONS:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < width and 0 <= ny < height:
+                    cells.append(ny * width + nx)
+            self.neighbours.append(tuple(cells))
+
+    def index(self, pos):
+        return pos[1] * self.width + pos[0]
+
+    def position(self, index):
+        return (index % self.width, index // self.width)
+
+    def occupancy(self, cells):
+        # 把坐标列表/集合转换成按下标查询的占用表，每次搜索只转换一次
+        grid = bytearray(self.size)
+        width, height = self.width, self.height
+        for x, y in cells:
+            if 0 <= x < width and 0 <= y < height:
+                grid[y * width + x] = 1
+        return grid
+
+    def blocked_grid(self, obstacles):
+        # 返回按格子下标排列的占用表；obstacles本身就是占用表（如Board.occupancy）时直接使用
+        if isinstance(obstacles, (bytearray, bytes)):
+            return obstacles
+        return self.occupancy(obstacles)
+
+    def _next_generation(self):
+        self.generation += 1
+        return self.generation
+
+    def _bfs(self, start, target, blocked):
+        # 广度优先搜索，发现目标时立即停止；返回是否可达
+        gen = self._next_generation()
+        seen = self.seen
+        parent = self.parent
+        neighbours = self.neighbours
+        seen[start] = gen
+        queue = deque([start])
+        popleft = queue.popleft
+        append = queue.append
+        while queue:
+            current = popleft()
+            for nxt in neighbours[current]:
+                if seen[nxt] != gen and not blocked[nxt]:
+                    seen[nxt] = gen
+                    parent[nxt] = current
+                    if nxt == target:
+                        return True
+                    append(nxt)
+        return False
+
+    def _astar(self, start, target, blocked):
+        # A*搜索，曼哈顿距离作为启发函数
+        gen = self._next_generation()
+        seen = self.seen
+        parent = self.parent
+        cost = self.cost
+        neighbours = self.neighbours
+        width = self.width
+        tx, ty = target % width, target // width
+
+        seen[start] = gen
+        cost[start] = 0
+        heap = [(abs(start % width - tx) + abs(start // width - ty), 0, start)]
+        while heap:
+            _, neg_g, current = heapq.heappop(heap)
+            g = -neg_g
+            if current == target:
+                return True
+            if g > cost[current]:
+                continue
+            g += 1
+            for nxt in neighbours[current]:
+                if blocked[nxt] or (seen[nxt] == gen and cost[nxt] <= g):
+                    continue
+                seen[nxt] = gen
+                cost[nxt] = g
+                parent[nxt] = current
+                h = abs(nxt % width - tx) + abs(nxt // width - ty)
+                # f相同时优先扩展离起点更远的格子，减少无谓的展开
+                heapq.heappush(heap, (g + h, -g, nxt))
+        return False
+
+    def _search(self, start, target, obstacles, astar):
+        blocked = self.blocked_grid(obstacles)
+        start, target = self.index(start), self.index(target)
+        if start == target:
+            return start, target, True
+        if astar:
+            found = self._astar(start, target, blocked)
+        else:
+            found = self._bfs(start, target, blocked)
+        return start, target, found
+
+    def _direction(self, current, nxt):
+        width = self.width
+        return (nxt % width - current % width, nxt // width - current // width)
+
+    def _trace(self, start, target):
+        # 沿前驱表从target回溯到start，返回不含start的格子下标列表
+        cells = []
+        parent = self.parent
+        current = target
+        while current != start:
+            cells.append(current)
+            current = parent[current]
+        cells.reverse()
+        return cells
+
+    def find_path(self, start, target, obstacles, astar=False):
+        # 返回从start到target的方向列表；不可达时返回None
+        start, target, found = self._search(start, target, obstacles, astar)
+        if not found:
+            return None
+        path = []
+        previous = start
+        for current in self._trace(start, target):
+            path.append(self._direction(previous, current))
+            previous = current
+        return path
+
+    def find_cells(self, start, target, blocked, astar=False):
+        # 与find_path相同，但参数和返回值都是格子下标；不可达时返回None
+        if start == target:
+            return []
+        found = self._astar(start, target, blocked) if astar else self._bfs(start, target, blocked)
+        return self._trace(start, target) if found else None
+
+    def first_move(self, start, target, obstacles, astar=False):
+        # 只返回路径的第一步，不构造整条路径；不可达或已在目标上时返回None
+        start, target, found = self._search(start, target, obstacles, astar)
+        if not found or start == target:
+            return None
+        parent = self.parent
+        current = target
+        while parent[current] != start:
+            current = parent[current]
+        return self._direction(start, current)
+
+    def distance_field(self, sources, obstacles):
+        # 从sources（一个或多个坐标）同时出发的BFS距离场，
+        # 每格的值为到最近源点的步数，不可达或被占用的格子为-1
+        blocked = self.blocked_grid(obstacles)
+        dist = [-1] * self.size
+        if sources and isinstance(sources[0], int):
+            sources = [sources]
+        queue = deque()
+        for source in sources:
+            start = self.index(source)
+            if dist[start] < 0:
+                dist[start] = 0
+                queue.append(start)
+        neighbours = self.neighbours
+        while queue:
+            current = queue.popleft()
+            d = dist[current] + 1
+            for nxt in neighbours[current]:
+                if dist[nxt] < 0 and not blocked[nxt]:
+                    dist[nxt] = d
+                    queue.append(nxt)
+        return dist
+
+class PathPlanner:
+    """在逻辑帧之间保留规划好的路径，只在路径失效时重新搜索"""
+
+    def __init__(self, pathfinder, board):
+        self.pathfinder = pathfinder
+        self.board = board
+        self.cells = []  # 规划好的路径格子下标，cells[step]是下一步要进入的格子
+        self.order = {}  # 格子下标 -> 在cells中的位置
+        self.step = 0
+        self.target = -1
+        self.version = 0  # 上次检查时的board.version
+        self.replans = 0
+        self.repairs = 0
+
+    def _plan(self, cells):
+        self.cells = cells
+        self.order = {cell: i for i, cell in enumerate(cells)}
+        self.step = 0
+
+    def _blocked_position(self):
+        # 返回路径上最早被新占用的格子位置，没有则返回-1
+        changed = self.board.occupied_since(self.version)
+        if changed is None:
+            # 变化太多，记录已被覆盖，直接逐格检查剩余路径
+            occupancy = self.board.occupancy
+            changed = [cell for cell in self.cells[self.step:] if occupancy[cell]]
+        order = self.order
+        first = -1
+        for cell in changed:
+            position = order.get(cell, -1)
+            if position >= self.step and (first < 0 or position < first):
+                first = position
+        return first
+
+    def next_move(self, head, target, obstacles, astar=False):
+        # 返回下一步的方向；不可达或已在目标上时返回None
+        finder = self.pathfinder
+        grid = finder.blocked_grid(obstacles)
+        head = finder.index(head)
+        target = finder.index(target)
+        cells = self.cells
+
+        if (target != self.target or self.step >= len(cells) or
+                (self.step > 0 and cells[self.step - 1] != head)):
+            # 果实换了位置，或蛇没有沿计划的路径前进：从蛇头完整地重新规划
+            self.replans += 1
+            self.target = target
+            self._plan(finder.find_cells(head, target, grid, astar) or [])
+        else:
+            blocked_at = self._blocked_position()
+            if blocked_at >= 0:
+                # 只修复被挡住的后半段：从挡住处前一格重新搜索到果实，
+                # 前半段的格子届时会被自己的身体占用，搜索时视为障碍
+                self.repairs += 1
+                prefix = cells[self.step:blocked_at]
+                suffix = None
+                if prefix:
+                    blocked = bytearray(grid)
+                    for cell in prefix[:-1]:
+                        blocked[cell] = 1
+                    suffix = finder.find_cells(prefix[-1], target, blocked, astar)
+                if suffix is not None:
+                    self._plan(prefix + suffix)
+                else:
+                    self._plan(finder.find_cells(head, target, grid, astar) or [])
+        self.version = self.board.version
+
+        if self.step >= len(self.cells):
+            return None
+        nxt = self.cells[self.step]
+        self.step += 1
+        return finder._direction(head, nxt)
+
+_pathfinders = {}
+
+def get_pathfinder(width, height):
+    # 同一尺寸的棋盘共用一个寻路器，邻接表只计算一次
+    finder = _pathfinders.get((width, height))
+    if finder is None:
+        finder = _pathfinders[(width, height)] = PathFinder(width, height)
+    return finder
@@ -0,0 +1,132 @@
+import csv
+import json
+import time
+from collections import deque
+
+# 分阶段性能统计：主循环用lap()按阶段计时，热点函数用watch()登记后
+# 在启用时替换成计时包装，关闭时恢复原函数，不启用时几乎没有额外开销。
+# 每个阶段保留最近window个样本，用于计算p50/p95/p99
+
+PERCENTILES = (50, 95, 99)
+
+def percentile(values, p):
+    # values已排序，取最近秩
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+class PhaseProfiler:
+    def __init__(self, window=1000):
+        self.window = window
+        self.enabled = False
+        self.samples = {}  # 阶段 -> 最近的耗时样本(毫秒)
+        self.totals = {}  # 阶段 -> [次数, 总耗时(毫秒), 最大耗时(毫秒)]
+        self.targets = []  # (对象, 属性名, 阶段)
+        self.originals = []
+        self.frame_start = 0.0
+        self.mark = 0.0
+        self.lines = []
+        self.lines_time = 0.0
+
+    def watch(self, owner, attr, phase):
+        # 登记要计时的函数，owner可以是模块或类
+        self.targets.append((owner, attr, phase))
+        if self.enabled:
+            self._wrap(owner, attr, phase)
+
+    def _wrap(self, owner, attr, phase):
+        func = getattr(owner, attr)
+        record = self.record
+        perf_counter = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(phase, (perf_counter() - start) * 1000)
+
+        self.originals.append((owner, attr, func))
+        setattr(owner, attr, timed)
+
+    def enable(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        for owner, attr, phase in self.targets:
+            self._wrap(owner, attr, phase)
+        self.frame_start = self.mark = time.perf_counter()
+
+    def disable(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        for owner, attr, func in reversed(self.originals):
+            setattr(owner, attr, func)
+        self.originals.clear()
+
+    def record(self, phase, ms):
+        samples = self.samples.get(phase)
+        if samples is None:
+            samples = self.samples[phase] = deque(maxlen=self.window)
+            self.totals[phase] = [0, 0.0, 0.0]
+        samples.append(ms)
+        total = self.totals[phase]
+        total[0] += 1
+        total[1] += ms
+        if ms > total[2]:
+            total[2] = ms
+
+    def start_frame(self):
+        if not self.enabled:
+            return
+        self.frame_start = self.mark = time.perf_counter()
+
+    def lap(self, phase):
+        # 记录从上一次lap（或帧开始）到现在的耗时
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.record(phase, (now - self.mark) * 1000)
+        self.mark = now
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        self.record('frame', (time.perf_counter() - self.frame_start) * 1000)
+
+    def summary(self):
+        # 每个阶段: 次数、平均、p50/p95/p99（最近window个样本）和最大耗时，单位毫秒
+        result = {}
+        for phase, samples in self.samples.items():
+            count, total, peak = self.totals[phase]
+            values = sorted(samples)
+            row = {'count': count, 'mean': total / count}
+            for p in PERCENTILES:
+                row[f'p{p}'] = percentile(values, p)
+            row['max'] = peak
+            result[phase] = row
+        return result
+
+    def overlay_lines(self, interval=0.5):
+        # 性能面板的文字，每interval秒更新一次，避免每帧重新渲染文字
+        now = time.perf_counter()
+        if now - self.lines_time >= interval:
+            self.lines_time = now
+            lines = [f'{"phase":<12}{"p50":>7}{"p95":>7}{"p99":>7}  ms']
+            for phase, row in sorted(self.summary().items()):
+                lines.append(f'{phase:<12}{row["p50"]:7.2f}{row["p95"]:7.2f}{row["p99"]:7.2f}')
+            self.lines = lines
+        return self.lines
+
+    def export(self, path):
+        # 按扩展名保存为JSON或CSV
+        summary = self.summary()
+        if path.endswith('.json'):
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, indent=2)
+            return
+        fields = ['count', 'mean'] + [f'p{p}' for p in PERCENTILES] + ['max']
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['phase'] + fields)
+            for phase, row in summary.items():
+                writer.writerow([phase] + [row['count']] + [f'{row[field]:.4f}' for field in fields[1:]])
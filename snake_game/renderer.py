@@ -0,0 +1,254 @@
+import pygame
+
+from snake_core import (
+    BLACK, WHITE, BLUE, YELLOW, GRAY, LIGHT_BLUE, DARK_GRAY,
+    WINDOW_SIZE, GRID_SIZE,
+)
+
+# 渲染层：网格背景只绘制一次，蛇身、果实和文字都缓存成Surface，
+# 每帧只重绘与上一帧不同的格子，并用display.update(rects)只提交这些区域
+
+TEXT_CACHE_LIMIT = 256
+OVERLAY_WIDTH = 260
+
+def draw_rounded_rect(surface, color, rect, radius=0.4):
+    """绘制圆角矩形"""
+    rect = pygame.Rect(rect)
+    color = pygame.Color(*color)
+    alpha = color.a
+    color.a = 0
+    pos = rect.topleft
+    rect.topleft = 0, 0
+    rectangle = pygame.Surface(rect.size, pygame.SRCALPHA)
+
+    circle = pygame.Surface([min(rect.size) * 3] * 2, pygame.SRCALPHA)
+    pygame.draw.ellipse(circle, (0, 0, 0), circle.get_rect(), 0)
+    circle = pygame.transform.smoothscale(circle, [int(min(rect.size) * radius)] * 2)
+
+    radius = rectangle.blit(circle, (0, 0))
+    radius.bottomright = rect.bottomright
+    rectangle.blit(circle, radius)
+    radius.topright = rect.topright
+    rectangle.blit(circle, radius)
+    radius.bottomleft = rect.bottomleft
+    rectangle.blit(circle, radius)
+
+    rectangle.fill((0, 0, 0), rect.inflate(-radius.w, 0))
+    rectangle.fill((0, 0, 0), rect.inflate(0, -radius.h))
+
+    rectangle.fill(color, special_flags=pygame.BLEND_RGBA_MAX)
+    rectangle.fill((255, 255, 255, alpha), special_flags=pygame.BLEND_RGBA_MIN)
+
+    surface.blit(rectangle, pos)
+
+def cell_rect(pos):
+    return pygame.Rect(pos[0] * GRID_SIZE, pos[1] * GRID_SIZE, GRID_SIZE, GRID_SIZE)
+
+class Renderer:
+    def __init__(self, screen, font, small_font):
+        self.screen = screen
+        self.font = font
+        self.small_font = small_font
+
+        # 预先绘制带网格线的背景
+        self.background = pygame.Surface(screen.get_size()).convert()
+        self.background.fill(WHITE)
+        for x in range(0, WINDOW_SIZE[0], GRID_SIZE):
+            for y in range(0, WINDOW_SIZE[1], GRID_SIZE):
+                pygame.draw.rect(self.background, GRAY, (x, y, GRID_SIZE, GRID_SIZE), 1)
+
+        # 果实精灵 - 使用圆形
+        self.fruit_sprite = pygame.Surface((GRID_SIZE, GRID_SIZE), pygame.SRCALPHA)
+        pygame.draw.circle(self.fruit_sprite, YELLOW, (GRID_SIZE // 2, GRID_SIZE // 2), GRID_SIZE // 2 - 2)
+
+        self.segment_sprites = {}
+        self.text_cache = {}
+
+        self.scene = None
+        self.cells = {}  # 上一帧每个格子上绘制的精灵
+        self.hud = []  # 上一帧的HUD文字 (surface, rect)
+
+        # 性能面板，使用pygame自带字体，数字和英文等宽对齐不依赖系统字体
+        self.overlay_font = None
+        self.overlay = None
+        self.overlay_lines = None
+
+    def invalidate(self):
+        # 下一帧整屏重绘
+        self.scene = None
+
+    def segment_sprite(self, color):
+        sprite = self.segment_sprites.get(color)
+        if sprite is None:
+            sprite = pygame.Surface((GRID_SIZE, GRID_SIZE), pygame.SRCALPHA)
+            draw_rounded_rect(sprite, color, (1, 1, GRID_SIZE - 2, GRID_SIZE - 2), 0.5)
+            self.segment_sprites[color] = sprite
+        return sprite
+
+    def text(self, font, text, color):
+        key = (id(font), text, color)
+        surface = self.text_cache.get(key)
+        if surface is None:
+            if len(self.text_cache) >= TEXT_CACHE_LIMIT:
+                self.text_cache.clear()
+            surface = self.text_cache[key] = font.render(text, True, color)
+        return surface
+
+    def _enter_scene(self, scene):
+        # 场景变化时需要整屏重绘，返回是否发生了变化
+        if scene == self.scene:
+            return False
+        self.scene = scene
+        return True
+
+    def _cell_contents(self, game):
+        # 统计每个格子上要绘制的精灵，按果实、玩家蛇、AI蛇的顺序叠加
+        cells = {game.fruit.position: (self.fruit_sprite,)}
+        for snake in [game.player_snake, game.ai_snake]:
+            sprite = self.segment_sprite(snake.color)
+            for segment in snake.body:
+                cells[segment] = cells.get(segment, ()) + (sprite,)
+        return cells
+
+    def _hud_items(self, game, difficulty):
+        # 显示得分
+        score_surface = self.text(self.font, f'玩家: {game.player_snake.score}  AI: {game.ai_snake.score}', BLACK)
+        # 显示剩余时间和当前难度
+        time_surface = self.text(self.font, f'剩余时间: {game.time_left}秒  难度: {difficulty}', BLACK)
+        time_rect = time_surface.get_rect()
+        time_rect.topleft = (WINDOW_SIZE[0] - time_rect.width - 10, 10)
+        return [(score_surface, score_surface.get_rect(topleft=(10, 10))), (time_surface, time_rect)]
+
+    def _draw_cells(self, cells, positions):
+        blit = self.screen.blit
+        for pos in positions:
+            for sprite in cells.get(pos, ()):
+                blit(sprite, (pos[0] * GRID_SIZE, pos[1] * GRID_SIZE))
+
+    def _draw_board(self, game, difficulty):
+        # 整屏绘制游戏界面
+        self.cells = self._cell_contents(game)
+        self.hud = self._hud_items(game, difficulty)
+        self.screen.blit(self.background, (0, 0))
+        self._draw_cells(self.cells, self.cells)
+        for surface, rect in self.hud:
+            self.screen.blit(surface, rect)
+
+    def draw_game(self, game, difficulty):
+        if self._enter_scene(('playing', id(game))):
+            self._draw_board(game, difficulty)
+            pygame.display.flip()
+            return
+
+        previous = self.cells
+        cells = self._cell_contents(game)
+        hud = self._hud_items(game, difficulty)
+
+        dirty = {pos for pos, sprites in cells.items() if previous.get(pos) != sprites}
+        dirty.update(pos for pos in previous if pos not in cells)
+        rects = [cell_rect(pos) for pos in dirty]
+
+        # HUD文字压在网格上：文字变化或下面的格子变化时，都要连同覆盖区域一起重绘。
+        # 按整格恢复背景，否则半透明的蛇身精灵会叠加在旧像素上越画越深
+        hud_changed = [item[0] for item in hud] != [item[0] for item in self.hud]
+        hud_rects = [rect for _, rect in self.hud] + [rect for _, rect in hud]
+        if not hud_changed:
+            hud_changed = any(rect.collidelist(rects) >= 0 for rect in hud_rects)
+        if hud_changed:
+            for rect in hud_rects:
+                for x in range(rect.left // GRID_SIZE, (rect.right - 1) // GRID_SIZE + 1):
+                    for y in range(rect.top // GRID_SIZE, (rect.bottom - 1) // GRID_SIZE + 1):
+                        if (x, y) not in dirty:
+                            dirty.add((x, y))
+                            rects.append(cell_rect((x, y)))
+
+        self.cells = cells
+        self.hud = hud
+        if not rects:
+            return
+
+        for rect in rects:
+            self.screen.blit(self.background, rect, rect)
+        self._draw_cells(cells, dirty)
+        if hud_changed:
+            for surface, rect in hud:
+                self.screen.blit(surface, rect)
+        pygame.display.update(rects)
+
+    def draw_overlay(self, lines):
+        # 在左下角叠加性能面板，文字变化时才重新渲染；面板大小变化时下一帧整屏重绘
+        if lines != self.overlay_lines:
+            if self.overlay_font is None:
+                self.overlay_font = pygame.font.Font(None, 20)
+            height = len(lines) * 16 + 8
+            if self.overlay is not None and self.overlay.get_height() != height:
+                self.invalidate()
+            self.overlay = pygame.Surface((OVERLAY_WIDTH, height))
+            self.overlay.fill(BLACK)
+            for i, line in enumerate(lines):
+                self.overlay.blit(self.overlay_font.render(line, True, WHITE), (6, 4 + i * 16))
+            self.overlay_lines = lines
+        rect = self.overlay.get_rect(bottomleft=(0, WINDOW_SIZE[1]))
+        self.screen.blit(self.overlay, rect)
+        pygame.display.update(rect)
+
+    def hide_overlay(self):
+        self.overlay = None
+        self.overlay_lines = None
+        self.invalidate()
+
+    def draw_menu(self, difficulty, difficulty_buttons, start_button):
+        # 菜单是静态画面，只有选中的难度变化时才重绘
+        if not self._enter_scene(('menu', difficulty)):
+            return
+        screen = self.screen
+        screen.fill(WHITE)
+
+        # 绘制标题
+        title_surface = self.text(self.font, "贪吃蛇大作战", BLACK)
+        screen.blit(title_surface, title_surface.get_rect(center=(WINDOW_SIZE[0]//2, WINDOW_SIZE[1]//4)))
+
+        # 绘制难度选择提示
+        difficulty_surface = self.text(self.font, "选择AI难度:", BLACK)
+        screen.blit(difficulty_surface, difficulty_surface.get_rect(center=(WINDOW_SIZE[0]//2, WINDOW_SIZE[1]//2 - 50)))
+
+        # 绘制难度按钮和按钮文字
+        for name, button in difficulty_buttons:
+            pygame.draw.rect(screen, LIGHT_BLUE if difficulty == name else GRAY, button, border_radius=5)
+            text = self.text(self.small_font, name, BLACK)
+            screen.blit(text, text.get_rect(center=button.center))
+        pygame.draw.rect(screen, BLUE, start_button, border_radius=5)
+        start_text = self.text(self.small_font, "开始", WHITE)
+        screen.blit(start_text, start_text.get_rect(center=start_button.center))
+
+        pygame.display.flip()
+
+    def draw_game_over(self, game, difficulty, continue_button, exit_button):
+        # 结束画面同样是静态的，每局只绘制一次
+        if not self._enter_scene(('game_over', id(game))):
+            return
+        screen = self.screen
+        self._draw_board(game, difficulty)
+
+        winner = game.winner()
+        if winner == "玩家":
+            result_text = "玩家获胜！"
+        elif winner == "AI":
+            result_text = "AI获胜！"
+        else:
+            result_text = "平局！"
+
+        final_score = f"{result_text} 最终比分 - 玩家: {game.player_snake.score}  AI: {game.ai_snake.score}"
+        result_surface = self.text(self.font, final_score, BLACK)
+        screen.blit(result_surface, result_surface.get_rect(center=(WINDOW_SIZE[0]//2, WINDOW_SIZE[1]//2)))
+
+        # 绘制继续和退出按钮
+        pygame.draw.rect(screen, LIGHT_BLUE, continue_button, border_radius=5)
+        pygame.draw.rect(screen, DARK_GRAY, exit_button, border_radius=5)
+
+        continue_text = self.text(self.small_font, "继续", WHITE)
+        exit_text = self.text(self.small_font, "退出", WHITE)
+        screen.blit(continue_text, continue_text.get_rect(center=continue_button.center))
+        screen.blit(exit_text, exit_text.get_rect(center=exit_button.center))
+
+        pygame.display.flip()
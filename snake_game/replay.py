@@ -0,0 +1,129 @@
+import argparse
+import struct
+import time
+
+from snake_core import DIFFICULTIES, DIRECTIONS, GRID_HEIGHT, GRID_WIDTH, TICK_RATE, Game
+
+# 对局回放：文件头记录随机种子和对局设置（包括逻辑帧率），之后每个逻辑帧一个字节
+# （高2位玩家蛇方向，低2位AI蛇方向）。回放时用记录的方向重新模拟，
+# 不需要调用AI，可以全速运行；按固定间隔保存状态快照，用于直接跳到第N帧
+
+MAGIC = b'SNKR'
+VERSION = 3
+HEADER = struct.Struct('<4sBQBBHHIHHH')
+HEADER_V2 = struct.Struct('<4sBQBBHHIHHB')  # 版本2的逻辑帧率只有一个字节
+HEADER_V1 = struct.Struct('<4sBQBBHHIHH')  # 版本1没有逻辑帧率，固定为TICK_RATE
+HEADERS = {1: HEADER_V1, 2: HEADER_V2, VERSION: HEADER}
+HUMAN = 255  # 玩家蛇由人控制
+SNAPSHOT_INTERVAL = 100
+
+def difficulty_code(difficulty):
+    return HUMAN if difficulty is None else DIFFICULTIES.index(difficulty)
+
+def difficulty_name(code):
+    return None if code == HUMAN else DIFFICULTIES[code]
+
+def encode(game):
+    header = HEADER.pack(MAGIC, VERSION, game.seed,
+                         difficulty_code(game.difficulty), difficulty_code(game.player_difficulty),
+                         GRID_WIDTH, GRID_HEIGHT, len(game.moves),
+                         game.player_snake.score, game.ai_snake.score, game.tick_rate)
+    return header + bytes(game.moves)
+
+def save(game, path):
+    with open(path, 'wb') as f:
+        f.write(encode(game))
+
+class Replay:
+    def __init__(self, data):
+        if data[:4] != MAGIC or len(data) < 5 or data[4] not in HEADERS:
+            raise ValueError("不是有效的回放文件")
+        header = HEADERS[data[4]]
+        if len(data) < header.size:
+            raise ValueError("不是有效的回放文件")
+        fields = header.unpack_from(data)
+        (_, _, self.seed, difficulty, player_difficulty,
+         width, height, ticks, self.player_score, self.ai_score) = fields[:10]
+        self.tick_rate = fields[10] if len(fields) > 10 else TICK_RATE
+        if (width, height) != (GRID_WIDTH, GRID_HEIGHT):
+            raise ValueError(f"回放的棋盘大小为{width}x{height}，与当前{GRID_WIDTH}x{GRID_HEIGHT}不一致")
+        self.difficulty = difficulty_name(difficulty)
+        self.player_difficulty = difficulty_name(player_difficulty)
+        self.moves = data[header.size:header.size + ticks]
+        self.snapshots = {}
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    def new_game(self):
+        return Game(self.difficulty, self.player_difficulty, seed=self.seed, tick_rate=self.tick_rate)
+
+    def advance(self, game, tick):
+        # 用记录的方向把game推进到第tick帧
+        moves = self.moves
+        end = min(tick, len(moves))
+        while game.tick < end and not game.game_over:
+            code = moves[game.tick]
+            game.step(DIRECTIONS[code >> 2], DIRECTIONS[code & 3])
+            if game.tick % SNAPSHOT_INTERVAL == 0 and game.tick not in self.snapshots:
+                self.snapshots[game.tick] = game.snapshot()
+        return game
+
+    def run(self):
+        # 全速重新模拟整局，最后再走一帧让时间到期的对局正常结束
+        game = self.advance(self.new_game(), len(self.moves))
+        game.step()
+        return game
+
+    def seek(self, tick):
+        # 从不晚于tick的最近快照开始模拟，返回第tick帧的状态
+        start = max((t for t in self.snapshots if t <= tick), default=None)
+        game = self.snapshots[start].snapshot() if start is not None else self.new_game()
+        return self.advance(game, tick)
+
+def render_board(game):
+    # 用字符画显示棋盘：P/p为玩家蛇头/身体，A/a为AI蛇头/身体，*为果实
+    rows = [['.'] * GRID_WIDTH for _ in range(GRID_HEIGHT)]
+    x, y = game.fruit.position
+    rows[y][x] = '*'
+    for snake, head, body in [(game.player_snake, 'P', 'p'), (game.ai_snake, 'A', 'a')]:
+        for index, (x, y) in enumerate(snake.body):
+            rows[y][x] = head if index == 0 else body
+    return '\n'.join(''.join(row) for row in rows)
+
+def describe(game):
+    return (f'第{game.tick}帧  玩家: {game.player_snake.score}分 长度{len(game.player_snake.body)} '
+            f'方向{game.player_snake.direction}  AI: {game.ai_snake.score}分 长度{len(game.ai_snake.body)} '
+            f'方向{game.ai_snake.direction}  果实{game.fruit.position}({game.fruit.points}分)')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='贪吃蛇对局回放')
+    parser.add_argument('replay', help='回放文件')
+    parser.add_argument('-t', '--tick', type=int, help='跳到第N帧并显示当时的状态')
+    parser.add_argument('--board', action='store_true', help='用字符画显示棋盘')
+    args = parser.parse_args(argv)
+
+    replay = Replay.load(args.replay)
+    print(f'种子 {replay.seed}  AI难度 {replay.difficulty}  玩家 {replay.player_difficulty or "人类"}  '
+          f'共{len(replay.moves)}帧  记录比分 {replay.player_score}:{replay.ai_score}')
+
+    start = time.perf_counter()
+    game = replay.run()
+    elapsed = time.perf_counter() - start
+    ok = (game.player_snake.score, game.ai_snake.score) == (replay.player_score, replay.ai_score)
+    print(f'重新模拟用时 {elapsed * 1000:.1f}毫秒  比分 {game.player_snake.score}:{game.ai_snake.score}  '
+          f'{"与记录一致" if ok else "与记录不一致"}')
+
+    if args.tick is not None:
+        game = replay.seek(args.tick)
+        print(describe(game))
+        if args.board:
+            print(render_board(game))
+    elif args.board:
+        print(describe(game))
+        print(render_board(game))
+
+if __name__ == "__main__":
+    main()
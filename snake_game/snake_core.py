@@ -0,0 +1,390 @@
+import copy
+import random
+from collections import deque
+
+from bitboard import get_bitboard
+from board import Board, BoardFullError
+from hamilton import CyclePlanner, get_cycle
+from pathfinding import PathPlanner, get_pathfinder
+
+# 游戏核心逻辑：不依赖pygame，可在无窗口环境下导入和运行
+
+# 颜色定义
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+BLUE = (0, 0, 255)
+YELLOW = (255, 255, 0)
+GRAY = (220, 220, 220)  # 淡化网格线颜色
+LIGHT_BLUE = (100, 149, 237)  # 玩家蛇的颜色
+DARK_GRAY = (50, 50, 50)  # AI蛇的颜色
+
+# 游戏设置
+WINDOW_SIZE = (800, 600)
+GRID_SIZE = 20
+GRID_WIDTH = WINDOW_SIZE[0] // GRID_SIZE
+GRID_HEIGHT = WINDOW_SIZE[1] // GRID_SIZE
+
+# 时间相关设置，全部以逻辑帧(tick)计数
+TICK_RATE = 10  # 每秒逻辑帧数，与原来的clock.tick(10)一致
+GAME_DURATION = 120  # 游戏时长(秒)
+FRUIT_REFRESH_INTERVAL = 10  # 普通果实刷新间隔(秒)
+SPECIAL_FRUITS = {30: 3, 60: 5, 90: 10}  # 特殊时间点(秒) -> 果实分值
+
+DIFFICULTIES = ("简单", "一般", "困难", "大师", "哈密顿")
+
+DIRECTIONS = ((0, 1), (1, 0), (0, -1), (-1, 0))
+DIRECTION_CODES = {direction: code for code, direction in enumerate(DIRECTIONS)}
+
+class Snake:
+    def __init__(self, x, y, color, is_player=False, board=None):
+        # 不传board时使用独立棋盘，多条蛇共享同一个Board才能互相感知
+        self.board = board if board is not None else Board(GRID_WIDTH, GRID_HEIGHT)
+        self.body = deque()
+        # 自身占用表，用于O(1)判断是否撞到自己
+        self.cells = bytearray(self.board.size)
+        self.direction = (1, 0)
+        self.color = color
+        self.score = 0
+        self.growth_pending = False
+        self.is_player = is_player  # 添加标记是否为玩家控制的蛇
+        self.move_this_frame = True  # 所有蛇都默认移动
+        self.planner = None  # 困难、大师和哈密顿AI在逻辑帧之间保留的规划状态
+        self.push_head((x, y))
+
+    def push_head(self, pos):
+        index = self.board.index(pos)
+        self.body.appendleft(pos)
+        self.cells[index] = 1
+        self.board.occupy(index)
+
+    def pop_tail(self):
+        tail = self.body.pop()
+        index = self.board.index(tail)
+        self.cells[index] = 0
+        self.board.release(index)
+        return tail
+
+    def occupies(self, pos):
+        return self.cells[self.board.index(pos)] != 0
+
+    def move(self):
+        # 所有蛇都会移动，不再需要检查move_this_frame
+        head = self.body[0]
+        new_head = (head[0] + self.direction[0], head[1] + self.direction[1])
+
+        # 检查是否撞墙
+        if not self.board.in_bounds(new_head):
+            return False
+
+        # 检查是否撞到自己（包括即将移走的蛇尾，与原规则一致）
+        if self.occupies(new_head):
+            return False
+
+        self.push_head(new_head)
+        if not self.growth_pending:
+            self.pop_tail()
+        else:
+            self.growth_pending = False
+
+        return True
+
+    def change_direction(self, new_direction):
+        # 防止180度转向
+        if (new_direction[0] * -1, new_direction[1] * -1) != self.direction:
+            self.direction = new_direction
+
+    def grow(self):
+        self.growth_pending = True
+
+    def get_head(self):
+        return self.body[0]
+
+class Fruit:
+    def __init__(self, points=1, spawn_tick=0, board=None, rng=random):
+        # rng为每局独立的随机数流，保证同一种子下果实位置可复现
+        self.rng = rng
+        # 传入board时直接放在空格子上，否则与原来一样随机取一个格子
+        self.position = board.random_free_cell(rng) if board is not None else self.get_random_position()
+        self.points = points
+        self.spawn_tick = spawn_tick
+
+    def get_random_position(self):
+        # 预先计算随机位置，避免在游戏循环中计算
+        x = self.rng.randint(0, GRID_WIDTH - 1)
+        y = self.rng.randint(0, GRID_HEIGHT - 1)
+        return (x, y)
+
+    def respawn(self, board):
+        # 从空闲格子索引中直接取位置，不会与蛇身体重叠；棋盘已满时抛出BoardFullError
+        self.position = board.random_free_cell(self.rng)
+
+def find_path(start, target, snake_bodies, astar=False):
+    # 返回方向列表；snake_bodies可以是坐标容器，也可以是Board.occupancy这样的占用表
+    return get_pathfinder(GRID_WIDTH, GRID_HEIGHT).find_path(start, target, snake_bodies, astar)
+
+def get_survival_move(ai_snake, preferred, snake_bodies):
+    # 移动前检查每个方向走进去之后还能到达多少空间：可到达的格子不少于蛇长，
+    # 或者还能追上自己的蛇尾，才算安全。优先走preferred，不安全时改走最安全、空间最大的方向
+    board = ai_snake.board
+    bitboard = get_bitboard(board.width, board.height)
+    grid = get_pathfinder(board.width, board.height).blocked_grid(snake_bodies)
+    occupied = bitboard.from_occupancy(grid)
+    body = ai_snake.body
+    length = len(body)
+    tail = 1 << board.index(body[-1])
+    if not ai_snake.growth_pending:
+        # 这一步蛇尾会移开，之后的空间里包括蛇尾所在的格子
+        occupied &= ~tail
+    free = bitboard.full & ~occupied
+
+    hx, hy = body[0]
+    reverse = (-ai_snake.direction[0], -ai_snake.direction[1])
+    best = None
+    best_rank = None
+    for direction in DIRECTIONS:
+        x, y = hx + direction[0], hy + direction[1]
+        if direction == reverse or not board.in_bounds((x, y)) or grid[y * board.width + x]:
+            continue
+        head = 1 << (y * board.width + x)
+        reach = bitboard.flood(head, free & ~head, length + 1)
+        area = reach.bit_count() - 1
+        safe = area >= length or length == 1 or bool(bitboard.expand(reach) & tail)
+        if safe and direction == preferred:
+            return direction
+        rank = (safe, area)
+        if best is None or rank > best_rank:
+            best = direction
+            best_rank = rank
+    return best
+
+# 添加不同难度AI的移动逻辑
+def get_ai_move(ai_snake, fruit_pos, snake_bodies, difficulty, astar=False, rng=random):
+    # snake_bodies通常直接传入共享棋盘的occupancy，AI蛇头被占用不影响寻路
+    ai_head = ai_snake.get_head()
+    pathfinder = get_pathfinder(ai_snake.board.width, ai_snake.board.height)
+
+    # 困难模式：使用完整的寻路算法，沿用上一帧规划的路径，被挡住时才重新规划
+    if difficulty == "困难":
+        if ai_snake.planner is None:
+            ai_snake.planner = PathPlanner(pathfinder, ai_snake.board)
+        move = ai_snake.planner.next_move(ai_head, fruit_pos, snake_bodies, astar)
+        if move:
+            return move
+
+    # 大师模式：按困难模式的路径走，但每一步都先用位棋盘检查会不会把自己困死
+    elif difficulty == "大师":
+        if ai_snake.planner is None:
+            ai_snake.planner = PathPlanner(pathfinder, ai_snake.board)
+        move = ai_snake.planner.next_move(ai_head, fruit_pos, snake_bodies, astar)
+        move = get_survival_move(ai_snake, move, snake_bodies)
+        if move:
+            return move
+
+    # 哈密顿模式：沿预先构造的哈密顿回路前进，安全时抄近路，每一步只需常数时间；
+    # 棋盘没有哈密顿回路或回路上的格子被另一条蛇挡住时，改走最安全的方向
+    elif difficulty == "哈密顿":
+        cycle = get_cycle(ai_snake.board.width, ai_snake.board.height)
+        move = None
+        if cycle is not None:
+            if ai_snake.planner is None:
+                ai_snake.planner = CyclePlanner(cycle)
+            move = ai_snake.planner.next_move(ai_snake, fruit_pos, pathfinder.blocked_grid(snake_bodies))
+        if move is None:
+            move = get_survival_move(ai_snake, None, snake_bodies)
+        if move:
+            return move
+
+    # 一般模式：只在一定距离内使用寻路算法，否则随机移动
+    elif difficulty == "一般":
+        # 计算与果实的曼哈顿距离
+        distance = abs(ai_head[0] - fruit_pos[0]) + abs(ai_head[1] - fruit_pos[1])
+        # 只有在距离小于10格时才使用寻路算法
+        if distance < 10:
+            move = pathfinder.first_move(ai_head, fruit_pos, snake_bodies, astar)
+            if move:
+                return move
+
+    # 简单模式：随机移动，有一定概率改变方向
+    elif difficulty == "简单":
+        # 有30%的概率随机改变方向
+        if rng.random() < 0.3:
+            # 随机选择一个有效的移动方向
+            possible_directions = []
+            for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
+                next_pos = (ai_head[0] + dx, ai_head[1] + dy)
+                # 确保不会撞墙或撞到自己
+                if ai_snake.board.in_bounds(next_pos) and not ai_snake.occupies(next_pos):
+                    # 确保不会180度转向
+                    if (dx * -1, dy * -1) != ai_snake.direction:
+                        possible_directions.append((dx, dy))
+
+            if possible_directions:
+                return rng.choice(possible_directions)
+
+        # 如果没有随机改变方向，尝试使用寻路算法
+        move = pathfinder.first_move(ai_head, fruit_pos, snake_bodies, astar)
+        if move:
+            return move
+
+    # 如果没有找到路径或者是简单模式随机移动，尝试避免撞墙
+    possible_directions = []
+    for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
+        next_pos = (ai_head[0] + dx, ai_head[1] + dy)
+        if ai_snake.board.in_bounds(next_pos) and not ai_snake.occupies(next_pos):
+            # 确保不会180度转向
+            if (dx * -1, dy * -1) != ai_snake.direction:
+                possible_directions.append((dx, dy))
+
+    if possible_directions:
+        return rng.choice(possible_directions)
+
+    # 如果没有可行的方向，返回当前方向（可能会导致游戏结束）
+    return ai_snake.direction
+
+class DirectionBuffer:
+    """按逻辑帧消费的方向输入队列，两帧之间快速连按的转向不会互相覆盖"""
+
+    def __init__(self, maxlen=3):
+        self.maxlen = maxlen
+        self.queue = deque()
+
+    def push(self, direction, current):
+        # current为蛇当前的方向；与队尾方向相同或相反的输入直接丢弃
+        last = self.queue[-1] if self.queue else current
+        if direction == last or direction == (-last[0], -last[1]):
+            return
+        if len(self.queue) < self.maxlen:
+            self.queue.append(direction)
+
+    def pop(self):
+        return self.queue.popleft() if self.queue else None
+
+    def clear(self):
+        self.queue.clear()
+
+class Game:
+    """一局对战的纯逻辑状态，每调用一次step()推进一个逻辑帧"""
+
+    def __init__(self, difficulty="一般", player_difficulty=None, seed=None, tick_rate=TICK_RATE):
+        self.difficulty = difficulty
+        # 每秒逻辑帧数，即蛇的速度；游戏时长和特殊果实时间点仍按秒计算
+        self.tick_rate = tick_rate
+        # player_difficulty不为None时玩家蛇也由AI控制（用于无窗口对战）
+        self.player_difficulty = player_difficulty
+        # 每局使用独立的随机数流：同一种子下果实和AI的随机选择完全一致
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        self.fruit_rng = random.Random(f'{self.seed}:fruit')
+        self.ai_rng = random.Random(f'{self.seed}:ai')
+        # 两条蛇共享同一个棋盘占用表，碰撞检测、果实生成和AI寻路都直接读取它
+        self.board = Board(GRID_WIDTH, GRID_HEIGHT)
+        self.player_snake = Snake(5, GRID_HEIGHT // 2, LIGHT_BLUE, is_player=True, board=self.board)  # 标记为玩家蛇
+        self.ai_snake = Snake(GRID_WIDTH - 6, GRID_HEIGHT // 2, DARK_GRAY, board=self.board)
+        self.fruit = Fruit(board=self.board, rng=self.fruit_rng)
+        self.tick = 0
+        self.last_fruit_spawn = 0
+        self.special_fruit_spawned = {second: False for second in SPECIAL_FRUITS}
+        self.game_over = False
+        self.collided = False  # 是否因撞墙或撞到自己结束
+        self.final_tick = 0
+        # 每个逻辑帧记录一个字节：高2位为玩家蛇方向，低2位为AI蛇方向，用于回放
+        self.moves = bytearray()
+
+    @property
+    def game_time(self):
+        return (self.final_tick if self.game_over else self.tick) / self.tick_rate
+
+    @property
+    def time_left(self):
+        return max(0, GAME_DURATION - int(self.game_time))
+
+    def winner(self):
+        # 返回"玩家"、"AI"，平局返回None
+        if self.player_snake.score > self.ai_snake.score:
+            return "玩家"
+        if self.ai_snake.score > self.player_snake.score:
+            return "AI"
+        return None
+
+    def end(self):
+        self.game_over = True
+        # 记录游戏结束时的时间，避免后续更新
+        self.final_tick = self.tick
+
+    def update_fruit(self):
+        # 检查是否吃到果实
+        fruit = self.fruit
+        for snake in [self.player_snake, self.ai_snake]:
+            if snake.get_head() == fruit.position:
+                snake.grow()
+                snake.score += fruit.points
+                # 重用现有果实对象，而不是创建新对象
+                fruit.respawn(self.board)
+                self.last_fruit_spawn = self.tick
+
+        # 特殊时间点的高分值果实，在对应秒的第一帧生成
+        for second, points in SPECIAL_FRUITS.items():
+            start = second * self.tick_rate
+            if start <= self.tick < start + self.tick_rate and not self.special_fruit_spawned[second]:
+                self.fruit = Fruit(points, self.tick, self.board, self.fruit_rng)
+                self.special_fruit_spawned[second] = True
+                break
+        else:
+            # 每10秒刷新一次普通果实
+            if self.tick - self.last_fruit_spawn >= FRUIT_REFRESH_INTERVAL * self.tick_rate:
+                self.fruit.respawn(self.board)
+                self.last_fruit_spawn = self.tick
+
+    def step(self, player_direction=None, ai_direction=None):
+        # 推进一个逻辑帧，返回游戏是否仍在进行；
+        # 传入ai_direction时不再调用AI（回放时使用记录下来的方向）
+        if self.game_over:
+            return False
+
+        # 检查游戏是否结束（2分钟时限）
+        if self.tick >= GAME_DURATION * self.tick_rate:
+            self.end()
+            return False
+
+        player_snake = self.player_snake
+        ai_snake = self.ai_snake
+        fruit = self.fruit
+
+        if player_direction is None and self.player_difficulty is not None:
+            player_direction = get_ai_move(player_snake, fruit.position, self.board.occupancy,
+                                           self.player_difficulty, rng=self.ai_rng)
+        if player_direction is not None:
+            player_snake.change_direction(player_direction)
+
+        # AI移动逻辑
+        if ai_direction is None:
+            ai_direction = get_ai_move(ai_snake, fruit.position, self.board.occupancy, self.difficulty, rng=self.ai_rng)
+        ai_snake.change_direction(ai_direction)
+
+        self.moves.append(DIRECTION_CODES[player_snake.direction] << 2 | DIRECTION_CODES[ai_snake.direction])
+
+        # 移动蛇
+        player_move_result = player_snake.move()
+        ai_move_result = ai_snake.move()
+
+        if not player_move_result or not ai_move_result:
+            self.collided = True
+            self.end()
+
+        try:
+            self.update_fruit()
+        except BoardFullError:
+            # 棋盘已被蛇占满，无处放置果实，本局结束
+            self.end()
+
+        self.tick += 1
+        return not self.game_over
+
+    def snapshot(self):
+        # 完整复制当前状态（包括随机数流），用于回放时快速跳转
+        return copy.deepcopy(self)
+
+    def run(self):
+        # 无窗口情况下以最快速度跑完整局
+        while self.step():
+            pass
+        return self
@@ -0,0 +1,215 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from board import Board
+from snake_core import DIRECTIONS, GAME_DURATION, GRID_HEIGHT, GRID_WIDTH, TICK_RATE, Snake
+
+# 批量向量化环境：N局单蛇游戏保存在预先分配的NumPy数组中，
+# 一次step(actions)用向量运算同时推进所有对局。
+# 规则与Snake.move、Fruit.respawn和吃果实判定一致：
+# 撞墙或撞到自己（包括即将移走的蛇尾）即结束，吃到果实后下一步不收缩蛇尾，
+# 果实等概率出现在空格子上；结束的对局自动重置
+
+DX = np.array([dx for dx, _ in DIRECTIONS], dtype=np.int64)
+DY = np.array([dy for _, dy in DIRECTIONS], dtype=np.int64)
+OPPOSITE = np.array([DIRECTIONS.index((-dx, -dy)) for dx, dy in DIRECTIONS], dtype=np.int64)
+RIGHT = DIRECTIONS.index((1, 0))
+
+class VecSnakeEnv:
+    def __init__(self, num_envs, width=GRID_WIDTH, height=GRID_HEIGHT,
+                 max_steps=GAME_DURATION * TICK_RATE, seed=None):
+        self.num_envs = num_envs
+        self.width = width
+        self.height = height
+        self.cells = width * height
+        self.max_steps = max_steps
+        self.rng = np.random.default_rng(seed)
+
+        n = num_envs
+        self.boards = np.zeros((n, self.cells), dtype=np.uint8)  # 每格被蛇身占用的次数
+        self.bodies = np.zeros((n, self.cells), dtype=np.int32)  # 环形缓冲区，start处为蛇头
+        self.start = np.zeros(n, dtype=np.int64)
+        self.lengths = np.zeros(n, dtype=np.int64)
+        self.heads = np.zeros(n, dtype=np.int64)  # 蛇头的一维下标 y * width + x
+        self.directions = np.zeros(n, dtype=np.int64)  # DIRECTIONS中的下标
+        self.growth_pending = np.zeros(n, dtype=bool)
+        self.scores = np.zeros(n, dtype=np.int64)
+        self.fruits = np.zeros(n, dtype=np.int64)
+        self.steps = np.zeros(n, dtype=np.int64)
+        self.rows = np.arange(n)
+        self.reset()
+
+    def reset(self, mask=None):
+        # 重置mask选中的对局（默认全部），蛇从左侧中间出发，向右移动
+        rows = self.rows if mask is None else self.rows[mask]
+        if rows.size == 0:
+            return
+        start_cell = (self.height // 2) * self.width + min(5, self.width - 1)
+        self.boards[rows] = 0
+        self.boards[rows, start_cell] = 1
+        self.start[rows] = 0
+        self.bodies[rows, 0] = start_cell
+        self.lengths[rows] = 1
+        self.heads[rows] = start_cell
+        self.directions[rows] = RIGHT
+        self.growth_pending[rows] = False
+        self.scores[rows] = 0
+        self.steps[rows] = 0
+        self.fruits[rows] = self._random_free_cells(rows)
+
+    def _random_free_cells(self, rows):
+        # 每局在空格子中等概率取一个；没有空格子时返回-1
+        keys = self.rng.random((rows.size, self.cells))
+        keys[self.boards[rows] != 0] = -1.0
+        cells = keys.argmax(axis=1)
+        cells[keys[np.arange(rows.size), cells] < 0] = -1
+        return cells
+
+    def step(self, actions):
+        """actions为每局的方向下标(0-3)，-1表示保持原方向；
+        返回 (rewards, dones, info)，info中的final_scores为结束对局重置前的得分"""
+        actions = np.asarray(actions, dtype=np.int64)
+        width = self.width
+
+        # 防止180度转向
+        turn = (actions >= 0) & (actions != OPPOSITE[self.directions])
+        self.directions = np.where(turn, actions, self.directions)
+
+        x = self.heads % width + DX[self.directions]
+        y = self.heads // width + DY[self.directions]
+        # 检查是否撞墙
+        dead = (x < 0) | (x >= width) | (y < 0) | (y >= self.height)
+        new_heads = np.where(dead, self.heads, y * width + x)
+        # 检查是否撞到自己
+        dead |= self.boards[self.rows, new_heads] != 0
+
+        alive = self.rows[~dead]
+        heads = new_heads[alive]
+        # 蛇头前进
+        start = (self.start[alive] - 1) % self.cells
+        self.start[alive] = start
+        self.bodies[alive, start] = heads
+        self.boards[alive, heads] += 1
+        self.heads[alive] = heads
+        self.lengths[alive] += 1
+        # 没有待生长时收缩蛇尾
+        shrink = alive[~self.growth_pending[alive]]
+        tail_slot = (self.start[shrink] + self.lengths[shrink] - 1) % self.cells
+        self.boards[shrink, self.bodies[shrink, tail_slot]] -= 1
+        self.lengths[shrink] -= 1
+        self.growth_pending[alive] = False
+
+        # 检查是否吃到果实
+        eaten = alive[self.heads[alive] == self.fruits[alive]]
+        self.growth_pending[eaten] = True
+        self.scores[eaten] += 1
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        rewards[eaten] = 1.0
+        rewards[dead] = -1.0
+        if eaten.size:
+            fruits = self._random_free_cells(eaten)
+            self.fruits[eaten] = fruits
+            # 棋盘已满，没有地方放果实
+            dead[eaten[fruits < 0]] = True
+
+        self.steps += 1
+        dones = dead | (self.steps >= self.max_steps)
+        info = {'final_scores': self.scores.copy(), 'final_lengths': self.lengths.copy()}
+        if dones.any():
+            self.reset(dones)
+        return rewards, dones, info
+
+    def observe(self):
+        # 返回 (棋盘占用, 蛇头, 果实) 的视图，棋盘形状为 (N, height, width)
+        return self.boards.reshape(self.num_envs, self.height, self.width), self.heads, self.fruits
+
+    def greedy_actions(self):
+        # 简单的向量化策略：在不会立即撞墙或撞到自己的方向中，选离果实曼哈顿距离最近的
+        width = self.width
+        hx = (self.heads % width)[:, None] + DX[None, :]
+        hy = (self.heads // width)[:, None] + DY[None, :]
+        inside = (hx >= 0) & (hx < width) & (hy >= 0) & (hy < self.height)
+        cells = np.where(inside, hy * width + hx, 0)
+        free = inside & (self.boards[self.rows[:, None], cells] == 0)
+        free &= np.arange(4)[None, :] != OPPOSITE[self.directions][:, None]
+        distance = np.abs(hx - (self.fruits % width)[:, None]) + np.abs(hy - (self.fruits // width)[:, None])
+        distance = np.where(free, distance, np.iinfo(np.int64).max)
+        return distance.argmin(axis=1)
+
+def cross_check(num_envs, steps, width=8, height=6, max_steps=300, seed=0):
+    # 用随机动作同时推进向量环境和逐局的Snake，每一步比较蛇身、方向、得分和结束判定，
+    # 返回不一致的步数。棋盘很小，撞墙、撞自己和占满棋盘都会经常发生
+    env = VecSnakeEnv(num_envs, width, height, max_steps, seed)
+    rng = np.random.default_rng(seed + 1)
+
+    def mirror(row):
+        # 按向量环境当前（刚重置）的状态建立一条对应的蛇
+        head = int(env.heads[row])
+        snake = Snake(head % width, head // width, (0, 0, 0), board=Board(width, height))
+        snake.direction = DIRECTIONS[env.directions[row]]
+        return snake
+
+    snakes = [mirror(row) for row in range(num_envs)]
+    mismatches = 0
+    for _ in range(steps):
+        fruits = env.fruits.copy()
+        counters = env.steps.copy()
+        actions = rng.integers(-1, 4, num_envs)
+        _, dones, info = env.step(actions)
+        for row, snake in enumerate(snakes):
+            if actions[row] >= 0:
+                snake.change_direction(DIRECTIONS[actions[row]])
+            done = not snake.move()
+            if not done and snake.get_head() == (fruits[row] % width, fruits[row] // width):
+                snake.grow()
+                snake.score += 1
+                # 果实由向量环境随机放置，这里只检查它落在空格子上
+                done = not snake.board.free_count()
+                if not done and not snake.board.is_free((env.fruits[row] % width, env.fruits[row] // width)):
+                    mismatches += 1
+            done = done or counters[row] + 1 >= max_steps
+            if done != dones[row] or snake.score != info['final_scores'][row]:
+                mismatches += 1
+            elif not done:
+                start, length = env.start[row], env.lengths[row]
+                cells = env.bodies[row, (start + np.arange(length)) % env.cells]
+                if ([y * width + x for x, y in snake.body] != cells.tolist() or
+                        DIRECTIONS[env.directions[row]] != snake.direction or
+                        bool(env.growth_pending[row]) != snake.growth_pending):
+                    mismatches += 1
+                    snakes[row] = mirror(row)
+            if dones[row]:
+                # 向量环境已经重置了这一局
+                snakes[row] = mirror(row)
+    return mismatches
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='向量化贪吃蛇环境吞吐量测试')
+    parser.add_argument('-n', '--envs', type=int, default=1024, help='并行对局数')
+    parser.add_argument('-s', '--steps', type=int, default=1000, help='step调用次数')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--check', action='store_true', help='在小棋盘上与Snake逐步对照规则，而不是测吞吐量')
+    args = parser.parse_args(argv)
+
+    if args.check:
+        mismatches = cross_check(args.envs, args.steps, seed=args.seed)
+        print(f'{args.envs}局 x {args.steps}步对照Snake: {mismatches}处不一致')
+        return 1 if mismatches else 0
+
+    env = VecSnakeEnv(args.envs, seed=args.seed)
+    finished = 0
+    total_score = 0
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        _, dones, info = env.step(env.greedy_actions())
+        finished += int(dones.sum())
+        total_score += int(info['final_scores'][dones].sum())
+    elapsed = time.perf_counter() - start
+    print(f'{args.envs}局 x {args.steps}步: {elapsed:.2f}秒, {args.envs * args.steps / elapsed:,.0f} 步/秒, '
+          f'结束{finished}局, 平均得分 {total_score / max(finished, 1):.2f}')
+
+if __name__ == "__main__":
+    sys.exit(main())